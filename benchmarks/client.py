@@ -0,0 +1,356 @@
+"""Benchmark the client against the in-process mock farmOS server.
+
+Measures the throughput and peak RSS growth of iterate, send, send_many and
+subrequests for FarmClient and AsyncFarmClient, and of building subrequests
+blueprints and filters. Each scenario runs in a fresh process after its data
+has been set up, and the fastest of several runs is kept. Results are saved as
+JSON so runs on different commits can be compared.
+
+Usage: python benchmarks/client.py [--records N] [--latency SECONDS] [--runs N]
+           [--codec NAME] [--scenario NAME ...] [--label LABEL]
+           [--compare RESULTS.json]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+
+from farmOS.codec import get_codec
+from farmOS.filter import And, Condition, Or
+from farmOS.mock_server import MockFarmServer
+from farmOS.subrequests_model import (
+    Action,
+    Subrequest,
+    SubrequestsBlueprint,
+    TrustedSubrequest,
+    serialize_blueprint,
+)
+
+
+def log_attributes(index):
+    """Attributes of a log--harvest resource similar to a farmOS response."""
+    return {
+        "name": f"Harvest corn field {index}",
+        "timestamp": "2024-07-08T12:00:00+00:00",
+        "status": "done",
+        "notes": {"value": "Harvested by hand. " * 5, "format": "default"},
+        "flag": ["review"],
+        "is_movement": False,
+        "data": None,
+    }
+
+
+def log_payloads(count):
+    return [{"attributes": log_attributes(index)} for index in range(count)]
+
+
+def setup_iterate(args, async_client):
+    server = MockFarmServer(latency=args.latency)
+    server.populate("log", "harvest", args.records, log_attributes)
+
+    if async_client:
+
+        async def run():
+            async with server.async_client(codec=args.codec) as farm:
+                count = 0
+                async for _ in farm.log.iterate("harvest", prefetch=args.prefetch):
+                    count += 1
+                return count
+
+        return run
+
+    def run():
+        with server.client(codec=args.codec) as farm:
+            return sum(1 for _ in farm.log.iterate("harvest", prefetch=args.prefetch))
+
+    return run
+
+
+def setup_send(args, async_client):
+    server = MockFarmServer(latency=args.latency)
+    payloads = log_payloads(args.sends)
+
+    if async_client:
+
+        async def run():
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def send(farm, payload):
+                async with semaphore:
+                    await farm.log.send("harvest", dict(payload))
+
+            async with server.async_client(codec=args.codec) as farm:
+                await asyncio.gather(*(send(farm, payload) for payload in payloads))
+            return len(payloads)
+
+        return run
+
+    def run():
+        with server.client(codec=args.codec) as farm:
+            for payload in payloads:
+                farm.log.send("harvest", dict(payload))
+        return len(payloads)
+
+    return run
+
+
+def setup_send_many(args, async_client):
+    server = MockFarmServer(latency=args.latency)
+    payloads = log_payloads(args.sends)
+
+    if async_client:
+
+        async def run():
+            async with server.async_client(codec=args.codec) as farm:
+                documents = await farm.log.send_many(
+                    "harvest", payloads, concurrency=args.concurrency
+                )
+            return len(documents)
+
+        return run
+
+    def run():
+        with server.client(codec=args.codec) as farm:
+            documents = farm.log.send_many(
+                "harvest", payloads, concurrency=args.concurrency
+            )
+        return len(documents)
+
+    return run
+
+
+def blueprint(payloads):
+    return SubrequestsBlueprint(
+        [
+            Subrequest(
+                action=Action.create,
+                requestId=str(index),
+                endpoint="api/log/harvest",
+                body={"data": {"type": "log--harvest", **payload}},
+            )
+            for index, payload in enumerate(payloads)
+        ]
+    )
+
+
+def trusted_blueprint(payloads):
+    return [
+        TrustedSubrequest(
+            action=Action.create,
+            requestId=str(index),
+            endpoint="api/log/harvest",
+            body={"data": {"type": "log--harvest", **payload}},
+        )
+        for index, payload in enumerate(payloads)
+    ]
+
+
+def setup_subrequests(args, async_client):
+    server = MockFarmServer(latency=args.latency)
+    payloads = log_payloads(args.blueprint_size)
+
+    if async_client:
+
+        async def run():
+            async with server.async_client(codec=args.codec) as farm:
+                response = await farm.subrequests.send(blueprint(payloads))
+            return len(response)
+
+        return run
+
+    def run():
+        with server.client(codec=args.codec) as farm:
+            response = farm.subrequests.send(blueprint(payloads))
+        return len(response)
+
+    return run
+
+
+def setup_blueprint(args, async_client):
+    # Build and serialize the blueprint like subrequests.send does.
+    payloads = log_payloads(args.blueprint_size)
+    codec = get_codec(args.codec)
+
+    def run():
+        serialize_blueprint(blueprint(payloads), codec)
+        return args.blueprint_size
+
+    return run
+
+
+def setup_trusted_blueprint(args, async_client):
+    payloads = log_payloads(args.blueprint_size)
+    codec = get_codec(args.codec)
+
+    def run():
+        serialize_blueprint(trusted_blueprint(payloads), codec)
+        return args.blueprint_size
+
+    return run
+
+
+def setup_filter(args, async_client):
+    def run():
+        for index in range(args.filters):
+            Or(
+                And(
+                    Condition("status", "done"),
+                    Condition("timestamp", [index, index + 86400], "BETWEEN"),
+                ),
+                Condition("flag", ["review", "priority"], "IN"),
+                Condition("name", f"Harvest {index}", "CONTAINS"),
+            ).params()
+        return args.filters
+
+    return run
+
+
+# Scenario name: (setup function, whether it runs with each client).
+SCENARIOS = {
+    "iterate": (setup_iterate, True),
+    "send": (setup_send, True),
+    "send_many": (setup_send_many, True),
+    "subrequests": (setup_subrequests, True),
+    "blueprint": (setup_blueprint, False),
+    "trusted_blueprint": (setup_trusted_blueprint, False),
+    "filter": (setup_filter, False),
+}
+
+
+def peak_rss_mb():
+    """Return the peak resident set size of the process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux.
+    if sys.platform == "darwin":
+        peak /= 1024
+    return peak / 1024
+
+
+def run_scenario(name, client, args):
+    """Set up and run a scenario, returning its measurements."""
+    setup, _ = SCENARIOS[name]
+    run = setup(args, client == "async")
+
+    # Keep the fastest of several runs to reduce noise.
+    rss_before = peak_rss_mb()
+    seconds = None
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        if asyncio.iscoroutinefunction(run):
+            items = asyncio.run(run())
+        else:
+            items = run()
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    peak_rss = peak_rss_mb()
+
+    return {
+        "scenario": name,
+        "client": client,
+        "items": items,
+        "seconds": round(seconds, 4),
+        "items_per_second": round(items / seconds, 1),
+        "peak_rss_mb": round(peak_rss, 1),
+        "rss_growth_mb": round(peak_rss - rss_before, 1),
+    }
+
+
+def compare(results, baseline):
+    """Print the throughput and memory of results relative to a baseline."""
+    previous = {
+        (result["scenario"], result["client"]): result for result in baseline["results"]
+    }
+    print(f"\nCompared with {baseline['label']}:")
+    print(f"{'scenario':<20}{'client':<8}{'speedup':>10}{'rss growth (MB)':>18}")
+    for result in results:
+        old = previous.get((result["scenario"], result["client"]))
+        if old is None:
+            continue
+        speedup = result["items_per_second"] / old["items_per_second"]
+        rss = result["rss_growth_mb"] - old["rss_growth_mb"]
+        print(
+            f"{result['scenario']:<20}{result['client']:<8}{speedup:>9.2f}x{rss:>+18.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--scenario", action="append", choices=list(SCENARIOS), dest="scenarios"
+    )
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--prefetch", type=int, default=None)
+    parser.add_argument("--sends", type=int, default=1000)
+    parser.add_argument("--blueprint-size", type=int, default=1000)
+    parser.add_argument("--filters", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument(
+        "--codec", default=None, help="JSON codec of the clients and blueprints."
+    )
+    parser.add_argument(
+        "--label",
+        default=datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S"),
+        help="Name of the run, eg: a commit hash.",
+    )
+    parser.add_argument("--output", help="Default: benchmarks/results/LABEL.json")
+    parser.add_argument("--compare", help="Results of a previous run to compare.")
+    args = parser.parse_args()
+
+    # Run each scenario in a fresh process so peak RSS is measured separately.
+    context = multiprocessing.get_context("spawn")
+    results = []
+    print(
+        f"{'scenario':<20}{'client':<8}{'items/s':>12}{'seconds':>10}{'rss growth (MB)':>18}"
+    )
+    for name in args.scenarios or SCENARIOS:
+        clients = ["sync", "async"] if SCENARIOS[name][1] else ["none"]
+        for client in clients:
+            with context.Pool(1) as pool:
+                result = pool.apply(run_scenario, (name, client, args))
+            results.append(result)
+            print(
+                f"{name:<20}{client:<8}{result['items_per_second']:>12.1f}"
+                f"{result['seconds']:>10.3f}{result['rss_growth_mb']:>18.1f}"
+            )
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "results", f"{args.label}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as results_file:
+        json.dump(
+            {
+                "label": args.label,
+                "date": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": {
+                    key: value
+                    for key, value in vars(args).items()
+                    if key not in ("output", "compare")
+                },
+                "results": results,
+            },
+            results_file,
+            indent=2,
+        )
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            compare(results, json.load(baseline_file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare the JSON codecs on realistic farmOS log pages.
+
+Usage: python benchmarks/codec.py [--pages N]
+"""
+
+import argparse
+import timeit
+import uuid
+
+from farmOS.codec import CODECS, get_codec
+
+
+def log_page(size=50):
+    """Build a JSONAPI page of log--harvest resources similar to a farmOS response."""
+
+    def log(n):
+        return {
+            "type": "log--harvest",
+            "id": str(uuid.uuid4()),
+            "links": {
+                "self": {"href": f"https://farm.example.com/api/log/harvest/{n}"}
+            },
+            "attributes": {
+                "drupal_internal__id": n,
+                "name": f"Harvest corn field {n}",
+                "timestamp": "2024-07-08T12:00:00+00:00",
+                "status": "done",
+                "notes": {"value": "Harvested by hand. " * 5, "format": "default"},
+                "flag": ["review"],
+                "is_movement": False,
+                "data": None,
+                "created": "2024-07-08T12:00:00+00:00",
+                "changed": "2024-07-08T12:05:00+00:00",
+                "geometry": {
+                    "value": "POINT (-75.2 40.1)",
+                    "geo_type": "Point",
+                    "lat": 40.1,
+                    "lon": -75.2,
+                },
+            },
+            "relationships": {
+                "asset": {
+                    "data": [
+                        {"type": "asset--plant", "id": str(uuid.uuid4())}
+                        for _ in range(3)
+                    ]
+                },
+                "quantity": {
+                    "data": [{"type": "quantity--standard", "id": str(uuid.uuid4())}]
+                },
+                "owner": {"data": [{"type": "user--user", "id": str(uuid.uuid4())}]},
+            },
+        }
+
+    return {
+        "jsonapi": {"version": "1.0", "meta": {"links": {}}},
+        "data": [log(n) for n in range(size)],
+        "links": {
+            "next": {
+                "href": "https://farm.example.com/api/log/harvest?page%5Boffset%5D=50"
+            },
+            "self": {"href": "https://farm.example.com/api/log/harvest"},
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args()
+
+    page = log_page()
+    body = get_codec("json").dumps(page)
+    print(f"Page size: {len(body)} bytes, {args.pages} pages per run.")
+    print(f"{'codec':<10}{'decode (ms/page)':>18}{'encode (ms/page)':>18}")
+
+    for name in CODECS:
+        try:
+            codec = get_codec(name)
+        except ImportError:
+            print(f"{name:<10}{'not installed':>18}")
+            continue
+        decode = min(
+            timeit.repeat(lambda: codec.loads(body), number=args.pages, repeat=3)
+        )
+        encode = min(
+            timeit.repeat(lambda: codec.dumps(page), number=args.pages, repeat=3)
+        )
+        print(
+            f"{name:<10}{decode / args.pages * 1000:>18.3f}{encode / args.pages * 1000:>18.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
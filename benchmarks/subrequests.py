@@ -0,0 +1,112 @@
+"""Compare the cost per item of building and serializing large subrequests blueprints.
+
+"model" validates each Subrequest and serializes the blueprint with pydantic,
+as subrequests.send did before serialize_blueprint. "trusted" builds
+TrustedSubrequest items and serializes them with serialize_blueprint, as
+send_many and delete_many do.
+
+Usage: python benchmarks/subrequests.py [--size N] [--codec NAME]
+"""
+
+import argparse
+import timeit
+
+from farmOS.codec import get_codec
+from farmOS.subrequests_model import (
+    Action,
+    Subrequest,
+    SubrequestsBlueprint,
+    TrustedSubrequest,
+    serialize_blueprint,
+)
+
+
+def payload(n):
+    return {
+        "data": {
+            "type": "log--harvest",
+            "attributes": {
+                "name": f"Harvest corn field {n}",
+                "timestamp": "2024-07-08T12:00:00+00:00",
+                "status": "done",
+                "notes": {"value": "Harvested by hand. " * 5, "format": "default"},
+            },
+        }
+    }
+
+
+def build_model(payloads):
+    return SubrequestsBlueprint(
+        [
+            Subrequest(
+                action=Action.create,
+                requestId=str(index),
+                endpoint="api/log/harvest",
+                body=body,
+            )
+            for index, body in enumerate(payloads)
+        ]
+    )
+
+
+def serialize_model(blueprint):
+    # Prepare each subrequest and dump the blueprint with pydantic.
+    for sub in blueprint:
+        sub.uri = sub.endpoint
+        sub.endpoint = None
+        sub.headers["Accept"] = "application/vnd.api+json"
+        sub.headers["Content-Type"] = "application/vnd.api+json"
+    return blueprint.model_dump_json(exclude_none=True)
+
+
+def build_trusted(payloads):
+    return [
+        TrustedSubrequest(
+            action=Action.create,
+            requestId=str(index),
+            endpoint="api/log/harvest",
+            body=body,
+        )
+        for index, body in enumerate(payloads)
+    ]
+
+
+def per_item(func, size):
+    """Return the fastest time of func in microseconds per item."""
+    return min(timeit.repeat(func, number=1, repeat=10)) / size * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=5000)
+    parser.add_argument("--codec", default=None)
+    args = parser.parse_args()
+
+    codec = get_codec(args.codec)
+    payloads = [payload(n) for n in range(args.size)]
+    model = build_model(payloads)
+    trusted = build_trusted(payloads)
+
+    results = {
+        "model": (
+            per_item(lambda: build_model(payloads), args.size),
+            per_item(lambda: serialize_model(model), args.size),
+        ),
+        "trusted": (
+            per_item(lambda: build_trusted(payloads), args.size),
+            per_item(lambda: serialize_blueprint(trusted, codec), args.size),
+        ),
+    }
+
+    print(f"Blueprint of {args.size} subrequests, {codec.name} codec.")
+    print(f"{'path':<10}{'build (us)':>12}{'serialize (us)':>16}{'total (us)':>12}")
+    for name, (build, serialize) in results.items():
+        print(f"{name:<10}{build:>12.2f}{serialize:>16.2f}{build + serialize:>12.2f}")
+
+    model_total = sum(results["model"])
+    trusted_total = sum(results["trusted"])
+    print(f"Speedup: {model_total / trusted_total:.1f}x per item.")
+
+
+if __name__ == "__main__":
+    main()
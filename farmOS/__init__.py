@@ -1,4 +1,6 @@
 from ._async.client import AsyncFarmClient
+from ._async.pool import AsyncFarmPool
 from ._sync.client import FarmClient
+from ._sync.pool import FarmPool
 
-__all__ = ["AsyncFarmClient", "FarmClient"]
+__all__ = ["AsyncFarmClient", "AsyncFarmPool", "FarmClient", "FarmPool"]
@@ -0,0 +1,210 @@
+import threading
+import time
+
+from farmOS._async.client import AsyncFarmClient
+from farmOS.concurrency import AsyncWorkerPool
+from farmOS.ratelimit import AsyncRateLimiter
+
+
+class _PooledFarm:
+    """Client options and state of a farm in a pool."""
+
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+        self.client = None
+        self.in_use = 0
+        self.last_used = time.monotonic()
+
+
+class AsyncFarmPool:
+    """Manage AsyncFarmClients for many farmOS hostnames.
+
+    farms is a list of hostnames or a dict of hostnames to the options of their
+    client, eg: auth. client_kwargs are passed to the client of every farm.
+    Clients are only created when a farm is used, and are closed once they have
+    been idle for idle_timeout seconds or when more than max_clients are open.
+    limiter is shared by the clients of every farm and max_per_host limits the
+    number of requests in flight to each farm.
+    """
+
+    def __init__(
+        self,
+        farms=None,
+        limiter=None,
+        max_per_host=None,
+        max_clients=None,
+        idle_timeout=None,
+        **client_kwargs,
+    ):
+        if max_per_host is not None and max_per_host < 1:
+            raise ValueError("max_per_host must be at least 1.")
+        if max_clients is not None and max_clients < 1:
+            raise ValueError("max_clients must be at least 1.")
+        self.limiter = limiter
+        self.max_per_host = max_per_host
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.client_kwargs = client_kwargs
+        self._farms = {}
+        self._lock = threading.Lock()
+
+        if isinstance(farms, dict):
+            for hostname, kwargs in farms.items():
+                self.add(hostname, **kwargs)
+        else:
+            for hostname in farms or []:
+                self.add(hostname)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    @property
+    def hostnames(self):
+        """List of the hostnames in the pool."""
+        return list(self._farms)
+
+    def add(self, hostname, **kwargs):
+        """Add a farm to the pool with options for its client."""
+        kwargs = {**self.client_kwargs, **kwargs}
+        if "limiter" not in kwargs:
+            kwargs["limiter"] = self.limiter
+            if self.max_per_host is not None:
+                kwargs["limiter"] = AsyncRateLimiter(
+                    max_in_flight=self.max_per_host, parent=self.limiter
+                )
+        with self._lock:
+            if hostname in self._farms:
+                raise ValueError(f"{hostname} is already in the pool.")
+            self._farms[hostname] = _PooledFarm(kwargs)
+
+    async def remove(self, hostname):
+        """Remove a farm from the pool and close its client."""
+        with self._lock:
+            farm = self._get_farm(hostname)
+            del self._farms[hostname]
+            client = farm.client
+            farm.client = None
+        if client is not None:
+            await client.aclose()
+
+    def client(self, hostname):
+        """Return a context manager that provides the client of a farm.
+
+        The client is not closed while it is in use.
+        """
+        return AsyncPoolCheckout(self, hostname)
+
+    async def map(self, func, hostnames=None, concurrency=10):
+        """Call func(client) for each farm, with up to concurrency farms at a time.
+
+        func is called for every hostname in the pool by default. Returns a
+        tuple of a dict of results and a dict of the exceptions raised, both
+        keyed by hostname.
+        """
+        if hostnames is None:
+            hostnames = self.hostnames
+
+        async def call(hostname):
+            try:
+                async with self.client(hostname) as client:
+                    return hostname, await func(client), None
+            except Exception as e:
+                return hostname, None, e
+
+        results = {}
+        errors = {}
+        pool = AsyncWorkerPool(max_workers=concurrency)
+        for hostname, result, error in await pool.map(call, hostnames):
+            if error is None:
+                results[hostname] = result
+            else:
+                errors[hostname] = error
+        return results, errors
+
+    async def evict_idle(self):
+        """Close the clients that are not in use and have expired."""
+        with self._lock:
+            clients = self._get_evicted()
+        for client in clients:
+            await client.aclose()
+        return len(clients)
+
+    async def aclose(self):
+        """Close the clients of every farm."""
+        with self._lock:
+            clients = [farm.client for farm in self._farms.values() if farm.client]
+            for farm in self._farms.values():
+                farm.client = None
+        for client in clients:
+            await client.aclose()
+
+    async def _checkout(self, hostname):
+        with self._lock:
+            farm = self._get_farm(hostname)
+            if farm.client is None:
+                farm.client = AsyncFarmClient(hostname, **farm.kwargs)
+            farm.in_use += 1
+            farm.last_used = time.monotonic()
+            client = farm.client
+            evicted = self._get_evicted()
+        for evicted_client in evicted:
+            await evicted_client.aclose()
+        return farm, client
+
+    def _checkin(self, farm):
+        with self._lock:
+            farm.in_use -= 1
+            farm.last_used = time.monotonic()
+
+    def _get_farm(self, hostname):
+        try:
+            return self._farms[hostname]
+        except KeyError:
+            raise ValueError(f"{hostname} is not in the pool.") from None
+
+    def _get_evicted(self):
+        """Detach and return the clients to close, the least recently used first."""
+        now = time.monotonic()
+        idle = sorted(
+            (
+                farm
+                for farm in self._farms.values()
+                if farm.client is not None and not farm.in_use
+            ),
+            key=lambda farm: farm.last_used,
+        )
+        open_clients = sum(farm.client is not None for farm in self._farms.values())
+
+        evicted = []
+        for farm in idle:
+            expired = (
+                self.idle_timeout is not None
+                and now - farm.last_used >= self.idle_timeout
+            )
+            over_limit = (
+                self.max_clients is not None
+                and open_clients - len(evicted) > self.max_clients
+            )
+            if expired or over_limit:
+                evicted.append(farm.client)
+                farm.client = None
+        return evicted
+
+
+class AsyncPoolCheckout:
+    """Context manager that provides the client of a farm in a pool."""
+
+    def __init__(self, pool, hostname):
+        self.pool = pool
+        self.hostname = hostname
+        self._farm = None
+
+    async def __aenter__(self):
+        self._farm, client = await self.pool._checkout(self.hostname)
+        return client
+
+    async def __aexit__(self, *args):
+        self.pool._checkin(self._farm)
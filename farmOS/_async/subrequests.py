@@ -1,6 +1,25 @@
+import logging
+import time
+from functools import partial
 from typing import List, Optional, Union
 
-from farmOS.subrequests_model import Format, SubrequestsBlueprint
+from farmOS.codec import get_codec
+from farmOS.concurrency import AsyncWorkerPool
+from farmOS.jsonstream import JSONObjectStreamParser
+from farmOS.metrics import RequestEvent, emit
+from farmOS.ratelimit import AsyncRateLimiter
+from farmOS.subrequests_graph import SubrequestsGraph
+from farmOS.subrequests_model import (
+    Format,
+    SubrequestsBlueprint,
+    SubrequestsResponse,
+    Subresponse,
+    iter_blueprint,
+    serialize_blueprint,
+)
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
 
 
 class SubrequestsBase:
@@ -10,48 +29,164 @@ class SubrequestsBase:
 
     def __init__(self, client):
         self.client = client
+        self.codec = getattr(client, "codec", None) or get_codec()
 
     async def send(
         self,
         blueprint: Union[SubrequestsBlueprint, List],
         format: Optional[Union[Format, str]] = Format.json,
+        chunk_size: Optional[int] = None,
+        concurrency: int = 4,
     ):
-        if isinstance(blueprint, List):
-            blueprint = SubrequestsBlueprint(blueprint)
+        """Send a blueprint of subrequests.
 
-        # Modify each sub-request as needed.
-        for sub in blueprint:
-            # Build the URI if an endpoint is provided.
-            if sub.uri is None and sub.endpoint is not None:
-                sub.uri = sub.endpoint
+        If chunk_size is provided, a larger blueprint is split into chunks of up
+        to chunk_size subrequests that are sent with up to concurrency chunks in
+        flight. Subrequests connected by waitFor are kept in the same chunk. The
+        responses of the chunks are merged into one SubrequestsResponse, so
+        chunking requires the json format. If a chunk fails, the requestIds of
+        its subrequests are mapped to the exception in the response errors.
 
-            # Set the endpoint to None so it is not included in the serialized subrequest.
-            sub.endpoint = None
+        With the json format a SubrequestsResponse is returned: a dict of
+        Subresponse keyed by requestId that decodes each body on first use. An
+        httpx.HTTPStatusError is raised if the subrequests request fails.
+
+        A ValueError is raised before anything is sent if a requestId is
+        duplicated, a waitFor reference is unknown or the dependencies contain
+        a cycle.
+        """
+        if isinstance(blueprint, List):
+            blueprint = SubrequestsBlueprint(blueprint)
 
-            # Auto populate headers for each sub-request.
-            if "Accept" not in sub.headers:
-                sub.headers["Accept"] = "application/vnd.api+json"
-            if sub.body is not None and "Content-Type" not in sub.headers:
-                sub.headers["Content-Type"] = "application/vnd.api+json"
+        # Check the waitFor dependencies before sending anything.
+        graph = SubrequestsGraph(blueprint)
+        graph.validate()
 
         params = {}
         if format == Format.json.value:
             params = {"_format": "json"}
 
-        # Generate the json to send. It is important to use the .model_dump_json() method
-        # of the model for correct serialization.
-        blueprint_json = blueprint.model_dump_json(exclude_none=True)
+        if chunk_size is not None and len(blueprint.root) > chunk_size:
+            if format != Format.json.value:
+                raise ValueError("Chunked blueprints require the json format.")
+            chunks = graph.chunks(chunk_size)
+            pool = AsyncWorkerPool(max_workers=concurrency)
+            send_chunk = partial(self._post, params=params, format=format)
+            # Keep the responses of the other chunks if one fails, since the
+            # server has already handled their subrequests.
+            responses = await pool.map(send_chunk, chunks, return_exceptions=True)
 
-        response = await self.client.request(
+            merged = SubrequestsResponse(codec=self.codec)
+            for chunk, response in zip(chunks, responses):
+                if isinstance(response, Exception):
+                    logger.warning(
+                        "Subrequests chunk of %s requests failed: %s",
+                        len(chunk.root),
+                        response,
+                    )
+                    merged.errors.update(
+                        {sub.requestId: response for sub in chunk.root}
+                    )
+                else:
+                    merged.update(response)
+            return merged
+
+        return await self._post(blueprint, params=params, format=format)
+
+    async def stream(self, blueprint: Union[SubrequestsBlueprint, List]):
+        """Send a blueprint and yield each (response key, Subresponse) as it is parsed.
+
+        The blueprint is serialized one subrequest at a time into a chunked
+        request body, and the json response is parsed as it is received, so
+        memory use does not grow with the size of the blueprint. The blueprint
+        is validated like send(). An httpx.HTTPStatusError is raised if the
+        subrequests request fails.
+        """
+        if isinstance(blueprint, List):
+            blueprint = SubrequestsBlueprint(blueprint)
+        SubrequestsGraph(blueprint).validate()
+
+        request = self.client.build_request(
             method="POST",
             url=self.subrequest_path,
-            params=params,
+            params={"_format": "json"},
             headers={"Content-Type": "application/json"},
-            content=blueprint_json,
+            content=self._iter_blueprint(blueprint),
+        )
+        limiter = getattr(self.client, "limiter", None) or AsyncRateLimiter()
+        async with limiter.limit(self.subrequest_path):
+            start = time.perf_counter()
+            response = await self.client.send(request, stream=True)
+
+        parser = JSONObjectStreamParser(loads=self.codec.loads)
+        size = 0
+        decode_seconds = 0.0
+        # Time spent by the consumer is excluded from the request time.
+        consumer_seconds = 0.0
+        try:
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                feed_start = time.perf_counter()
+                members = parser.feed(chunk)
+                decode_seconds += time.perf_counter() - feed_start
+                for key, subresponse in members:
+                    yield_start = time.perf_counter()
+                    yield key, Subresponse(subresponse, codec=self.codec)
+                    consumer_seconds += time.perf_counter() - yield_start
+            parser.close()
+        finally:
+            await response.aclose()
+
+        seconds = time.perf_counter() - start - decode_seconds - consumer_seconds
+        event = RequestEvent.from_response(
+            response, seconds, "subrequests", self.subrequest_path, size=size
+        )
+        event.decode_seconds = decode_seconds
+        emit(self.client, event)
+
+    async def _iter_blueprint(self, blueprint):
+        """Helper function that yields the chunks of a streamed request body."""
+        for chunk in iter_blueprint(blueprint, self.codec):
+            yield chunk
+
+    async def _post(self, blueprint, params, format):
+        """Helper function that posts one blueprint to the subrequests endpoint."""
+
+        blueprint_json = serialize_blueprint(blueprint, self.codec)
+
+        limiter = getattr(self.client, "limiter", None) or AsyncRateLimiter()
+        async with limiter.limit(self.subrequest_path):
+            start = time.perf_counter()
+            response = await self.client.request(
+                method="POST",
+                url=self.subrequest_path,
+                params=params,
+                headers={"Content-Type": "application/json"},
+                content=blueprint_json,
+            )
+            seconds = time.perf_counter() - start
+
+        event = RequestEvent.from_response(
+            response, seconds, "subrequests", self.subrequest_path
         )
 
         # Return a json response if requested.
         if format == Format.json.value:
-            return response.json()
+            # An error response holds a JSONAPI errors document, not subresponses.
+            if response.is_error:
+                emit(self.client, event)
+                response.raise_for_status()
+            start = time.perf_counter()
+            try:
+                return SubrequestsResponse(
+                    self.codec.loads(response.content), codec=self.codec
+                )
+            finally:
+                event.decode_seconds = time.perf_counter() - start
+                emit(self.client, event)
 
+        emit(self.client, event)
         return response
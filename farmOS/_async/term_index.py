@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class TermIndex:
+    """A local index of the terms in a taxonomy vocabulary.
+
+    Terms are loaded once and then kept up to date by only requesting terms
+    that changed since the last sync. Lookups by name or id are answered from
+    the local index without making a request.
+    """
+
+    def __init__(self, term_api, vocabulary, path=None):
+        self.term_api = term_api
+        self.vocabulary = vocabulary
+        self.path = path
+        self.cursor = {}
+        self._terms = {}
+        self._names = {}
+
+        # Start warm from a previously saved index.
+        if path is not None and os.path.exists(path):
+            self.restore(path)
+
+    async def load(self):
+        """Load every term in the vocabulary, replacing the current index."""
+        logger.debug("Loading all terms of vocabulary: %s", self.vocabulary)
+        self._terms = {}
+        self._names = {}
+        self.cursor = {}
+        await self._sync()
+
+    async def refresh(self):
+        """Update the index with terms that changed since the last sync.
+
+        Terms deleted from the server are not detected by a refresh. Use load()
+        to rebuild the index from scratch.
+        """
+        if not self.cursor:
+            return await self.load()
+
+        logger.debug(
+            "Refreshing terms of vocabulary: %s changed since: %s",
+            self.vocabulary,
+            self.cursor["changed"],
+        )
+        await self._sync()
+
+    async def _sync(self):
+        async for term in self.term_api.changes_since(
+            self.vocabulary, cursor=self.cursor
+        ):
+            self._add(term)
+        if self.path is not None:
+            self.save()
+
+    def get(self, id):
+        """Return the term with the given id, or None."""
+        return self._terms.get(id)
+
+    def get_id(self, name):
+        """Return the id of the term with the given name, or None."""
+        return self._names.get(name)
+
+    def lookup(self, name):
+        """Return the term with the given name, or None."""
+        id = self._names.get(name)
+        if id is None:
+            return None
+        return self._terms[id]
+
+    def save(self, path=None):
+        """Save the index to a JSON file."""
+        path = path or self.path
+        with open(path, "w") as index_file:
+            json.dump(
+                {
+                    "vocabulary": self.vocabulary,
+                    "cursor": self.cursor,
+                    "terms": list(self._terms.values()),
+                },
+                index_file,
+            )
+
+    def restore(self, path=None):
+        """Restore the index from a JSON file created by save()."""
+        path = path or self.path
+        with open(path) as index_file:
+            data = json.load(index_file)
+        if data["vocabulary"] != self.vocabulary:
+            raise ValueError(
+                f"Index file {path} is for vocabulary {data['vocabulary']}, not {self.vocabulary}."
+            )
+        self._terms = {}
+        self._names = {}
+        for term in data["terms"]:
+            self._add(term)
+        self.cursor = data["cursor"]
+
+    def _add(self, term):
+        # Remove the previous name of a renamed term.
+        previous = self._terms.get(term["id"])
+        if previous is not None:
+            previous_name = previous["attributes"]["name"]
+            if self._names.get(previous_name) == term["id"]:
+                del self._names[previous_name]
+
+        self._terms[term["id"]] = term
+        self._names[term["attributes"]["name"]] = term["id"]
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __len__(self):
+        return len(self._terms)
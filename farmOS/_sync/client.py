@@ -4,12 +4,27 @@ from functools import partial
 from httpx import Client
 
 from farmOS._sync import resource, subrequests
+from farmOS.codec import get_codec
 from farmOS.filter import filter
 
 
 class FarmClient(Client):
-    def __init__(self, hostname, **kwargs):
+    def __init__(
+        self,
+        hostname,
+        cache=None,
+        codec=None,
+        hooks=None,
+        retry=None,
+        limiter=None,
+        **kwargs,
+    ):
         super().__init__(base_url=hostname, **kwargs)
+        self.cache = cache
+        self.retry = retry
+        self.limiter = limiter
+        self.hooks = list(hooks or [])
+        self.codec = get_codec(codec)
         self.info = partial(resource.info, self)
         self.filter = filter
         self.subrequests = subrequests.SubrequestsBase(self)
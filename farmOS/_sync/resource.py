@@ -1,6 +1,24 @@
 # AUTO-GENERATED FILE: do not edit manually. Generated by unasync.py.
 import logging
-from urllib.parse import urlparse
+import math
+import time
+from datetime import datetime
+from functools import partial
+from itertools import count
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from httpx import HTTPStatusError, TransportError
+
+from farmOS._sync.subrequests import SubrequestsBase
+from farmOS._sync.term_index import TermIndex
+from farmOS.cache import CacheEntry
+from farmOS.codec import get_codec
+from farmOS.concurrency import Clock, WorkerPool
+from farmOS.filter import And, Condition, Or, filter
+from farmOS.jsonstream import JSONAPIStreamParser
+from farmOS.metrics import RequestEvent, emit
+from farmOS.ratelimit import RateLimiter
+from farmOS.subrequests_model import Action, Format, TrustedSubrequest
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
@@ -12,9 +30,11 @@ class ResourceBase:
     def __init__(self, client):
         self.client = client
         self.params = {}
+        self.codec = getattr(client, "codec", None) or get_codec()
+        self.subrequests = SubrequestsBase(client)
 
     def _get_records(
-        self, entity_type, bundle=None, resource_id=None, params=None
+        self, entity_type, bundle=None, resource_id=None, params=None, operation="get"
     ):
         """Helper function that checks to retrieve one record, one page or multiple pages of farmOS records"""
         if params is None:
@@ -24,8 +44,147 @@ class ResourceBase:
 
         path = self._get_resource_path(entity_type, bundle, resource_id)
 
-        response = self.client.request(method="GET", url=path, params=params)
-        return response.json()
+        return self._get_json(
+            path,
+            params=params,
+            operation=operation,
+            entity_type=entity_type,
+            bundle=bundle,
+        )
+
+    def _get_json(
+        self, path, params=None, operation="get", entity_type=None, bundle=None
+    ):
+        """Helper function that GETs a JSONAPI document, using the client cache if configured."""
+        endpoint = path
+        if entity_type is not None:
+            endpoint = self._get_resource_path(entity_type, bundle)
+
+        cache = getattr(self.client, "cache", None)
+        if cache is None:
+            response, seconds = self._request(
+                method="GET", url=path, params=params
+            )
+            event = RequestEvent.from_response(
+                response,
+                seconds,
+                operation,
+                endpoint,
+                entity_type,
+                bundle,
+            )
+            return self._decode(response.content, event)
+
+        key = cache.get_key(path, params, base_url=self.client.base_url)
+        entry = cache.get(key)
+        if entry is not None and entry.is_fresh(cache.ttl):
+            event = RequestEvent(
+                operation,
+                "GET",
+                endpoint,
+                entity_type,
+                bundle,
+                status=200,
+                size=len(entry.content),
+                cached=True,
+            )
+            return self._decode(entry.content, event)
+
+        # Revalidate a stale entry with a conditional request.
+        headers = {} if entry is None else entry.get_validators()
+        response, seconds = self._request(
+            method="GET", url=path, params=params, headers=headers
+        )
+        event = RequestEvent.from_response(
+            response,
+            seconds,
+            operation,
+            endpoint,
+            entity_type,
+            bundle,
+        )
+        if entry is not None and response.status_code == 304:
+            logger.debug("Revalidated cached response: %s", key)
+            cache.set(key, CacheEntry(entry.content, entry.etag, entry.last_modified))
+            return self._decode(entry.content, event)
+
+        if cache.is_cacheable(response):
+            cache.set(key, CacheEntry.from_response(response))
+        return self._decode(response.content, event)
+
+    def _request(self, method, url, stream=False, **kwargs):
+        """Helper function that sends a request, retrying transient errors with the client retry policy.
+
+        Returns the response and the seconds taken by the last attempt. Only
+        idempotent methods are retried. If the request still fails with a
+        retryable status once retries are exhausted an HTTPStatusError is raised.
+        With stream=True the body of the returned response is not read.
+        """
+        retry = getattr(self.client, "retry", None)
+        if retry is None or not retry.is_retryable_method(method):
+            return self._send(method, url, stream=stream, **kwargs)
+
+        attempt = 0
+        while True:
+            try:
+                response, seconds = self._send(
+                    method, url, stream=stream, **kwargs
+                )
+            except TransportError as e:
+                delay = retry.get_delay(attempt)
+                if delay is None:
+                    raise
+                reason = type(e).__name__
+            else:
+                delay = retry.get_delay(attempt, response)
+                if delay is None:
+                    if retry.is_retryable_status(response.status_code):
+                        response.read()
+                        response.raise_for_status()
+                    return response, seconds
+                reason = response.status_code
+                # Release the connection of a streamed response before retrying.
+                response.close()
+
+            attempt += 1
+            logger.warning(
+                "Retrying %s %s after %s in %.2fs (retry %s)",
+                method,
+                url,
+                reason,
+                delay,
+                attempt,
+            )
+            Clock.sleep(delay)
+
+    def _send(self, method, url, stream=False, **kwargs):
+        """Helper function that sends one request within the client rate limits.
+
+        A streamed response only holds the rate limiter slot until it starts.
+        """
+        with self._limit(url):
+            start = time.perf_counter()
+            if stream:
+                request = self.client.build_request(method=method, url=url, **kwargs)
+                response = self.client.send(request, stream=True)
+            else:
+                # Use request() so that clients overriding it are respected.
+                response = self.client.request(method=method, url=url, **kwargs)
+            return response, time.perf_counter() - start
+
+    def _limit(self, url):
+        """Helper function that returns the client rate limiter context for a url."""
+        limiter = getattr(self.client, "limiter", None) or RateLimiter()
+        return limiter.limit(url)
+
+    def _decode(self, content, event):
+        """Helper function that decodes a JSON body and emits its request event to the client hooks."""
+        start = time.perf_counter()
+        try:
+            return self.codec.loads(content)
+        finally:
+            event.decode_seconds = time.perf_counter() - start
+            emit(self.client, event)
 
     def get(self, entity_type, bundle=None, params=None):
         return self._get_records(
@@ -40,23 +199,442 @@ class ResourceBase:
             resource_id=resource_id,
         )
 
-    def iterate(self, entity_type, bundle=None, params=None):
-        response = self._get_records(
-            entity_type=entity_type, bundle=bundle, params=params
+    def iterate(
+        self,
+        entity_type,
+        bundle=None,
+        params=None,
+        prefetch=None,
+        stream=False,
+        resolve_includes=False,
+        page_size=None,
+        checkpoint=None,
+    ):
+        """Iterate over all resources, requesting each page of records as needed.
+
+        If prefetch is provided, up to that many page requests are kept in flight
+        by requesting page[offset] windows ahead of the consumer. Resources are
+        still yielded in order.
+
+        If stream is True, each resource is yielded as soon as it has been parsed
+        from the response body so that memory use is bounded by the size of one
+        resource rather than one page. Streamed responses are not cached.
+
+        If resolve_includes is True, the included resources of each relationship
+        are added to the relationship as "resolved". Included resources are
+        shared between all records of the iteration rather than copied.
+
+        If page_size is a farmOS.paging.AdaptivePageSize, the page[limit] of each
+        page request is tuned from the latency and size of the previous pages.
+        The chosen limits are available from its limit and history attributes.
+
+        If checkpoint is a farmOS.checkpoint.Checkpoint, the position of the
+        iteration is recorded after each resource and saved after each page. An
+        iteration started with a saved checkpoint resumes where it stopped.
+        """
+        self._check_iterate_options(
+            prefetch, stream, resolve_includes, page_size, checkpoint
+        )
+        if stream:
+            for resource in self._iterate_stream(entity_type, bundle, params):
+                yield resource
+            return
+
+        # Map of (type, id) to included resources, shared by all pages.
+        included = {} if resolve_includes else None
+
+        if page_size is not None:
+            for resource in self._iterate_adaptive(
+                entity_type, bundle, params, page_size, included
+            ):
+                yield resource
+            return
+
+        resources = self._iterate_pages(
+            entity_type, bundle, params, prefetch, included, checkpoint
+        )
+        try:
+            for resource in resources:
+                yield resource
+        finally:
+            resources.close()
+
+    @staticmethod
+    def _check_iterate_options(
+        prefetch, stream, resolve_includes, page_size, checkpoint
+    ):
+        """Helper function that raises a ValueError for unsupported iterate options."""
+
+        if checkpoint is not None and (stream or page_size is not None):
+            raise ValueError(
+                "The checkpoint option can not be combined with stream or page_size."
+            )
+        if stream and (prefetch or resolve_includes or page_size is not None):
+            raise ValueError(
+                "The stream option can not be combined with prefetch, resolve_includes or page_size."
+            )
+        if page_size is not None and prefetch:
+            raise ValueError("The page_size option can not be combined with prefetch.")
+
+    def _iterate_pages(
+        self, entity_type, bundle, params, prefetch, included, checkpoint
+    ):
+        """Helper function that yields the resources of each page, resuming from checkpoint."""
+        url = None
+        skip = 0
+        if checkpoint is not None:
+            checkpoint.start(entity_type, bundle, params)
+            if checkpoint.done:
+                return
+            url, skip = checkpoint.url, checkpoint.index
+
+        pages = self._get_pages(entity_type, bundle, params, prefetch, url)
+        try:
+            for url, response in pages:
+                resources = self._get_page_resources(response, included)
+                for index in range(skip, len(resources)):
+                    # Only count a resource as returned once the consumer asks for
+                    # the next one, so that a resource whose processing failed is
+                    # returned again when the iteration is resumed.
+                    if checkpoint is not None:
+                        checkpoint.advance(url, index)
+                    yield resources[index]
+                    if checkpoint is not None:
+                        checkpoint.advance(url, index + 1)
+                skip = 0
+                if checkpoint is not None:
+                    checkpoint.next_page(self._get_next_url(response))
+        finally:
+            pages.close()
+
+    def _get_pages(self, entity_type, bundle, params, prefetch=None, url=None):
+        """Helper function that yields the pagination link and response of each page.
+
+        Starts from the first page, or from the page at url if provided. The link
+        of the first page is None.
+        """
+        if url is None:
+            response = self._get_records(
+                entity_type=entity_type,
+                bundle=bundle,
+                params=params,
+                operation="iterate",
+            )
+        else:
+            response = self._get_page(url, entity_type, bundle)
+        yield url, response
+        next_url = self._get_next_url(response)
+
+        if prefetch and next_url is not None:
+            pool = WorkerPool(max_workers=prefetch)
+            offset_paths = self._get_offset_paths(
+                next_url, default_limit=len(response["data"])
+            )
+            get_page = partial(self._get_page, entity_type=entity_type, bundle=bundle)
+            pages = pool.imap(get_page, offset_paths)
+            try:
+                for response in pages:
+                    yield next_url, response
+                    # Stop once the last page has been reached.
+                    next_url = self._get_next_url(response)
+                    if not response["data"] or next_url is None:
+                        break
+            finally:
+                pages.close()
+            return
+
+        while next_url is not None:
+            response = self._get_page(next_url, entity_type, bundle)
+            yield next_url, response
+            next_url = self._get_next_url(response)
+
+    @staticmethod
+    def _get_page_resources(response, included=None):
+        """Helper function that returns the resources of a page.
+
+        If an included map is provided, the included resources of the page are
+        added to it and the relationships of each resource are resolved.
+        """
+
+        if included is None:
+            return response["data"]
+
+        for resource in response.get("included", []):
+            # Keep the first copy so each resource is only stored once.
+            included.setdefault((resource["type"], resource["id"]), resource)
+
+        for resource in response["data"]:
+            for relationship in resource.get("relationships", {}).values():
+                data = relationship.get("data")
+                if isinstance(data, list):
+                    relationship["resolved"] = [
+                        included[(item["type"], item["id"])]
+                        for item in data
+                        if (item["type"], item["id"]) in included
+                    ]
+                elif data is not None:
+                    relationship["resolved"] = included.get((data["type"], data["id"]))
+        return response["data"]
+
+    def _iterate_stream(self, entity_type, bundle=None, params=None):
+        """Helper function that streams the resources of each page as they are parsed."""
+        if params is None:
+            params = {}
+        params = {**self.params, **params}
+        endpoint = path = self._get_resource_path(entity_type, bundle)
+
+        while path is not None:
+            parser = JSONAPIStreamParser(loads=self.codec.loads)
+            size = 0
+            decode_seconds = 0.0
+            # Time spent by the consumer is excluded from the request time.
+            consumer_seconds = 0.0
+            # Only hold a rate limiter slot until the response starts so that the
+            # consumer can make other requests while the page is streamed.
+            start = time.perf_counter()
+            response, _ = self._request(
+                method="GET", url=path, stream=True, params=params
+            )
+            try:
+                # Error responses have no data, raise instead of ending early.
+                if response.is_error:
+                    response.read()
+                    response.raise_for_status()
+                for chunk in response.iter_bytes():
+                    size += len(chunk)
+                    feed_start = time.perf_counter()
+                    resources = parser.feed(chunk)
+                    decode_seconds += time.perf_counter() - feed_start
+                    for resource in resources:
+                        yield_start = time.perf_counter()
+                        yield resource
+                        consumer_seconds += time.perf_counter() - yield_start
+            finally:
+                response.close()
+            document = parser.close()
+
+            seconds = time.perf_counter() - start - decode_seconds - consumer_seconds
+            event = RequestEvent.from_response(
+                response,
+                seconds,
+                "iterate",
+                endpoint,
+                entity_type,
+                bundle,
+                size=size,
+            )
+            event.decode_seconds = decode_seconds
+            emit(self.client, event)
+
+            next_url = self._get_next_url(document)
+            if next_url is None:
+                path = None
+            else:
+                parsed_url = urlparse(next_url)
+                path = parsed_url._replace(scheme="", netloc="").geturl()
+                params = None
+
+    def _iterate_adaptive(
+        self, entity_type, bundle, params, page_size, included=None
+    ):
+        """Helper function that requests page[offset] windows with a tuned page[limit]."""
+        if params is None:
+            params = {}
+        params = {**self.params, **params}
+        path = self._get_resource_path(entity_type, bundle)
+        offset = int(params.get("page[offset]", 0))
+
+        while True:
+            limit = page_size.limit
+            page_params = {**params, "page[limit]": limit, "page[offset]": offset}
+            response, seconds = self._request(
+                method="GET", url=path, params=page_params
+            )
+            event = RequestEvent.from_response(
+                response,
+                seconds,
+                "iterate",
+                path,
+                entity_type,
+                bundle,
+            )
+            document = self._decode(response.content, event)
+            seconds = event.seconds + event.decode_seconds
+
+            records = len(document["data"])
+            more = records > 0 and self._get_next_url(document) is not None
+            page_size.record(limit, records, seconds, len(response.content), more)
+            logger.debug(
+                "Requested %s records at offset %s in %.3fs, next page limit: %s",
+                limit,
+                offset,
+                seconds,
+                page_size.limit,
+            )
+
+            for resource in self._get_page_resources(document, included):
+                yield resource
+            if not more:
+                break
+            # Advance by the records returned in case the server capped the limit.
+            offset += records
+
+    def _get_page(self, url, entity_type=None, bundle=None):
+        """Helper function that retrieves one page of records from a pagination link."""
+        parsed_url = urlparse(url)
+        path = parsed_url._replace(scheme="", netloc="").geturl()
+        return self._get_json(
+            path, operation="iterate", entity_type=entity_type, bundle=bundle
         )
+
+    @staticmethod
+    def _get_next_url(response):
+        """Helper function that returns the next pagination link of a response."""
+        try:
+            return response["links"]["next"]["href"]
+        except KeyError:
+            return None
+
+    @staticmethod
+    def _get_offset_paths(next_url, default_limit=None):
+        """Helper function that generates paths to successive page[offset] windows."""
+        parsed_url = urlparse(next_url)
+        query = parse_qsl(parsed_url.query, keep_blank_values=True)
+        page_params = dict(query)
+        offset = int(page_params.get("page[offset]", 0))
+        limit = int(page_params.get("page[limit]", default_limit))
+        query = [(key, value) for key, value in query if key != "page[offset]"]
+        for page_offset in count(offset, limit):
+            page_query = urlencode([*query, ("page[offset]", page_offset)])
+            yield parsed_url._replace(scheme="", netloc="", query=page_query).geturl()
+
+    def export(
+        self, entity_type, bundle=None, params=None, shards=None, concurrency=4
+    ):
+        """Iterate over all resources by fetching drupal_internal__id shards in parallel.
+
+        The id range of the matching resources is divided into shards that are
+        fetched with up to concurrency shards in flight. Resources are yielded
+        in drupal_internal__id order and at most concurrency shards are held in
+        memory at once.
+        """
+        if params is None:
+            params = {}
+        if shards is None:
+            shards = concurrency * 4
+
+        id_field = self._get_internal_id_field(entity_type)
+        first = self._get_records(
+            entity_type=entity_type,
+            bundle=bundle,
+            params={**params, "sort": id_field, "page[limit]": 1},
+            operation="export",
+        )
+        last = self._get_records(
+            entity_type=entity_type,
+            bundle=bundle,
+            params={**params, "sort": "-" + id_field, "page[limit]": 1},
+            operation="export",
+        )
+        if not first["data"] or not last["data"]:
+            return
+
+        min_id = first["data"][0]["attributes"][id_field]
+        max_id = last["data"][0]["attributes"][id_field]
+        shard_size = math.ceil((max_id - min_id + 1) / shards)
+        id_ranges = [
+            (start, min(start + shard_size - 1, max_id))
+            for start in range(min_id, max_id + 1, shard_size)
+        ]
+
+        pool = WorkerPool(max_workers=concurrency)
+        export_shard = partial(self._export_shard, entity_type, bundle, params)
+        shard_records = pool.imap(export_shard, id_ranges)
+        try:
+            for records in shard_records:
+                for resource in records:
+                    yield resource
+        finally:
+            shard_records.close()
+
+    def _export_shard(self, entity_type, bundle, params, id_range):
+        """Helper function that retrieves all resources within a drupal_internal__id range."""
+        id_field = self._get_internal_id_field(entity_type)
+        shard_params = {
+            **params,
+            **filter(id_field, list(id_range), "BETWEEN"),
+            "sort": id_field,
+        }
+        return [
+            resource
+            for resource in self.iterate(
+                entity_type=entity_type, bundle=bundle, params=shard_params
+            )
+        ]
+
+    def changes_since(self, entity_type, bundle=None, cursor=None, params=None):
+        """Iterate over resources that changed after the cursor, oldest first.
+
+        The cursor is a dict holding the changed timestamp and id of the last
+        resource that was yielded. It is updated in place as each resource is
+        yielded, so it can be saved at any point and passed to a later call to
+        resume without skipping or repeating resources. An empty cursor yields
+        every resource.
+        """
+        if cursor is None:
+            cursor = {}
+        if params is None:
+            params = {}
+
+        # Request each page relative to the cursor instead of following offset
+        # pagination links so that resources changing during the scan can not
+        # shift records across page boundaries.
         more = True
         while more:
-            # TODO: Should we merge in the "includes" info here?
+            page_params = {
+                **params,
+                **self._get_changes_filter(cursor),
+                "sort": "changed,id",
+            }
+            response = self._get_records(
+                entity_type=entity_type,
+                bundle=bundle,
+                params=page_params,
+                operation="changes_since",
+            )
             for resource in response["data"]:
+                cursor["changed"] = self._get_timestamp(
+                    resource["attributes"]["changed"]
+                )
+                cursor["id"] = resource["id"]
                 yield resource
-            try:
-                next_url = response["links"]["next"]["href"]
-                parsed_url = urlparse(next_url)
-                next_path = parsed_url._replace(scheme="", netloc="").geturl()
-                response = self.client.request(method="GET", url=next_path)
-                response = response.json()
-            except KeyError:
-                more = False
+            more = bool(response["data"]) and self._get_next_url(response) is not None
+
+    @staticmethod
+    def _get_changes_filter(cursor):
+        """Helper function that builds filter params for resources after a cursor."""
+
+        if cursor.get("changed") is None:
+            return {}
+
+        changed = cursor["changed"]
+        if cursor.get("id") is None:
+            return Condition("changed", changed, ">").params(prefix="changes_")
+
+        # Resources changed in the same second as the cursor are ordered by id.
+        # Prefix the ids so that they do not replace a filter in the params.
+        return Or(
+            Condition("changed", changed, ">"),
+            And(Condition("changed", changed), Condition("id", cursor["id"], ">")),
+        ).params(prefix="changes_")
+
+    @staticmethod
+    def _get_timestamp(changed):
+        """Helper function that converts a JSONAPI date value into a unix timestamp."""
+
+        if isinstance(changed, (int, float)):
+            return int(changed)
+        return int(datetime.fromisoformat(changed.replace("Z", "+00:00")).timestamp())
 
     def send(self, entity_type, bundle=None, payload=None):
         # Default to empty payload dict.
@@ -77,20 +655,20 @@ class ResourceBase:
             path = self._get_resource_path(
                 entity_type=entity_type, bundle=bundle, record_id=id
             )
-            response = self.client.request(
+            response, seconds = self._request(
                 method="PATCH",
                 url=path,
-                json=json_payload,
+                content=self.codec.dumps(json_payload),
                 headers={"Content-Type": "application/vnd.api+json"},
             )
         # If no ID is included, create a new record
         else:
             logger.debug("Creating record of entity type: %s", entity_type)
             path = self._get_resource_path(entity_type=entity_type, bundle=bundle)
-            response = self.client.request(
+            response, seconds = self._request(
                 method="POST",
                 url=path,
-                json=json_payload,
+                content=self.codec.dumps(json_payload),
                 headers={"Content-Type": "application/vnd.api+json"},
             )
 
@@ -102,14 +680,205 @@ class ResourceBase:
         if response.status_code == 200:
             logger.debug("Record updated.")
 
-        return response.json()
+        self._invalidate_cache(entity_type, bundle)
+        event = RequestEvent.from_response(
+            response,
+            seconds,
+            "send",
+            self._get_resource_path(entity_type, bundle),
+            entity_type,
+            bundle,
+        )
+        return self._decode(response.content, event)
+
+    def send_many(
+        self,
+        entity_type,
+        bundle=None,
+        payloads=None,
+        batch_size=50,
+        concurrency=4,
+        progress=None,
+    ):
+        """Create or update many resources using batches of subrequests.
+
+        Payloads are packed into blueprints of up to batch_size subrequests and
+        up to concurrency blueprints are sent at once. Returns a list with the
+        response document for each payload, in the same order as payloads.
+        Failed records are returned as a JSON:API errors document.
+        """
+        if payloads is None:
+            payloads = []
+
+        resource_type = self._get_resource_type(entity_type, bundle)
+        requests = []
+        for index, payload in enumerate(payloads):
+            data = {**payload, "type": resource_type}
+            id = data.get("id")
+            path = self._get_resource_path(
+                entity_type=entity_type, bundle=bundle, record_id=id
+            )
+            requests.append(
+                TrustedSubrequest(
+                    action=Action.update if id else Action.create,
+                    requestId=str(index),
+                    endpoint=path,
+                    body={"data": data},
+                )
+            )
+
+        logger.debug(
+            "Sending %s records of entity type: %s", len(requests), entity_type
+        )
+        subresponses = self._send_batches(
+            requests, batch_size, concurrency, progress
+        )
+        self._invalidate_cache(entity_type, bundle)
+        return [
+            self._get_subresponse_document(subresponses.get(sub.requestId))
+            for sub in requests
+        ]
+
+    def delete_many(
+        self,
+        entity_type,
+        bundle=None,
+        ids=None,
+        batch_size=50,
+        concurrency=4,
+        progress=None,
+    ):
+        """Delete many resources using batches of subrequests.
+
+        Returns a dict mapping each id to the HTTP status code of its delete
+        request. If its batch request failed, the status code of the batch
+        response is used, or None if no response was returned.
+        """
+        if ids is None:
+            ids = []
+
+        requests = [
+            TrustedSubrequest(
+                action=Action.delete,
+                requestId=str(index),
+                endpoint=self._get_resource_path(
+                    entity_type=entity_type, bundle=bundle, record_id=id
+                ),
+            )
+            for index, id in enumerate(ids)
+        ]
+
+        logger.debug("Deleting %s records of entity type: %s", len(ids), entity_type)
+        subresponses = self._send_batches(
+            requests, batch_size, concurrency, progress
+        )
+        self._invalidate_cache(entity_type, bundle)
+        return {
+            id: self._get_subresponse_status(subresponses.get(sub.requestId))
+            for id, sub in zip(ids, requests)
+        }
+
+    def _send_batches(self, requests, batch_size, concurrency, progress=None):
+        """Helper function that sends subrequests in concurrent blueprint batches.
+
+        Returns a dict mapping each request id to its subresponse. If progress is
+        provided it is called with the number of completed and total requests
+        after each batch.
+        """
+        batches = []
+        for start in range(0, len(requests), batch_size):
+            end = start + batch_size
+            batches.append(requests[start:end])
+        pool = WorkerPool(max_workers=concurrency)
+        batch_responses = pool.imap(self._send_batch, batches)
+        subresponses = {}
+        completed = 0
+        try:
+            for batch_count, batch_response in batch_responses:
+                subresponses.update(batch_response)
+                completed += batch_count
+                if progress is not None:
+                    progress(completed, len(requests))
+        finally:
+            batch_responses.close()
+        return subresponses
+
+    def _send_batch(self, batch):
+        """Helper function that sends a blueprint and maps subresponses to request ids.
+
+        If sending the blueprint fails, the exception is mapped to each request id.
+        """
+        try:
+            response = self.subrequests.send(batch, format=Format.json)
+        except Exception as e:
+            logger.warning("Subrequests batch of %s requests failed: %s", len(batch), e)
+            return len(batch), {sub.requestId: e for sub in batch}
+
+        return len(batch), {
+            sub.requestId: response.get_response(sub.requestId) for sub in batch
+        }
+
+    def _get_subresponse_document(self, subresponse):
+        """Helper function that decodes the JSONAPI document of a subresponse."""
+        if subresponse is None:
+            return self._get_error_document(None, "No response was returned.")
+        if isinstance(subresponse, Exception):
+            return self._get_error_document(
+                self._get_subresponse_status(subresponse),
+                f"{type(subresponse).__name__}: {subresponse}",
+            )
+
+        try:
+            return subresponse.json()
+        except ValueError:
+            return self._get_error_document(subresponse.status, subresponse["body"])
+
+    @staticmethod
+    def _get_subresponse_status(subresponse):
+        """Helper function that returns the HTTP status code of a subresponse."""
+
+        # The status of the subrequests response if the batch request failed.
+        if isinstance(subresponse, HTTPStatusError):
+            return subresponse.response.status_code
+        if subresponse is None or isinstance(subresponse, Exception):
+            return None
+        return subresponse.status
+
+    @staticmethod
+    def _get_error_document(status, detail):
+        """Helper function that builds a JSONAPI errors document."""
+
+        error = {"detail": detail}
+        if status is not None:
+            error["status"] = str(status)
+        return {"errors": [error]}
 
     def delete(self, entity_type, bundle=None, id=None):
         logger.debug("Deleted record id: %s of entity type: %s", id, entity_type)
         path = self._get_resource_path(
             entity_type=entity_type, bundle=bundle, record_id=id
         )
-        return self.client.request(method="DELETE", url=path)
+        response, seconds = self._request(method="DELETE", url=path)
+        self._invalidate_cache(entity_type, bundle)
+        emit(
+            self.client,
+            RequestEvent.from_response(
+                response,
+                seconds,
+                "delete",
+                self._get_resource_path(entity_type, bundle),
+                entity_type,
+                bundle,
+            ),
+        )
+        return response
+
+    def _invalidate_cache(self, entity_type, bundle=None):
+        """Helper function that removes cached responses for a resource type."""
+        cache = getattr(self.client, "cache", None)
+        if cache is not None:
+            path = self._get_resource_path(entity_type, bundle)
+            cache.invalidate(cache.get_key(path, base_url=self.client.base_url))
 
     @staticmethod
     def _get_resource_path(entity_type, bundle=None, record_id=None):
@@ -125,6 +894,16 @@ class ResourceBase:
 
         return path
 
+    @staticmethod
+    def _get_internal_id_field(entity_type):
+        """Helper function that returns the name of the drupal internal id attribute."""
+
+        if entity_type == "taxonomy_term":
+            return "drupal_internal__tid"
+        if entity_type == "user":
+            return "drupal_internal__uid"
+        return "drupal_internal__id"
+
     @staticmethod
     def _get_resource_type(entity_type, bundle=None):
         """Helper function that builds a JSONAPI resource name."""
@@ -153,9 +932,41 @@ class ResourceHelperBase:
             params=params,
         )
 
-    def iterate(self, bundle, params=None):
+    def iterate(
+        self,
+        bundle,
+        params=None,
+        prefetch=None,
+        stream=False,
+        resolve_includes=False,
+        page_size=None,
+        checkpoint=None,
+    ):
         for item in self.resource_api.iterate(
-            entity_type=self.entity_type, bundle=bundle, params=params
+            entity_type=self.entity_type,
+            bundle=bundle,
+            params=params,
+            prefetch=prefetch,
+            stream=stream,
+            resolve_includes=resolve_includes,
+            page_size=page_size,
+            checkpoint=checkpoint,
+        ):
+            yield item
+
+    def export(self, bundle, params=None, shards=None, concurrency=4):
+        for item in self.resource_api.export(
+            entity_type=self.entity_type,
+            bundle=bundle,
+            params=params,
+            shards=shards,
+            concurrency=concurrency,
+        ):
+            yield item
+
+    def changes_since(self, bundle, cursor=None, params=None):
+        for item in self.resource_api.changes_since(
+            entity_type=self.entity_type, bundle=bundle, cursor=cursor, params=params
         ):
             yield item
 
@@ -164,11 +975,35 @@ class ResourceHelperBase:
             entity_type=self.entity_type, bundle=bundle, payload=payload
         )
 
+    def send_many(
+        self, bundle, payloads, batch_size=50, concurrency=4, progress=None
+    ):
+        return self.resource_api.send_many(
+            entity_type=self.entity_type,
+            bundle=bundle,
+            payloads=payloads,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            progress=progress,
+        )
+
     def delete(self, bundle, id):
         return self.resource_api.delete(
             entity_type=self.entity_type, bundle=bundle, id=id
         )
 
+    def delete_many(
+        self, bundle, ids, batch_size=50, concurrency=4, progress=None
+    ):
+        return self.resource_api.delete_many(
+            entity_type=self.entity_type,
+            bundle=bundle,
+            ids=ids,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            progress=progress,
+        )
+
 
 class AssetAPI(ResourceHelperBase):
     """API for interacting with farm assets"""
@@ -193,6 +1028,10 @@ class TermAPI(ResourceHelperBase):
         # Define 'taxonomy_term' as the farmOS API entity endpoint
         super().__init__(client=client, entity_type="taxonomy_term")
 
+    def index(self, vocabulary, path=None):
+        """Create a local index of the terms in a vocabulary."""
+        return TermIndex(self, vocabulary, path=path)
+
 
 def info(client):
     """Retrieve info about the farmOS server."""
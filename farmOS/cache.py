@@ -0,0 +1,196 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+# Response caches for GET requests made by the resource methods. A cache is
+# enabled by passing it to the client, eg: FarmClient(hostname, cache=MemoryCache())
+
+
+class CacheEntry:
+    """A cached response body and the validators needed to revalidate it.
+
+    The raw body is cached rather than the decoded document so that each hit
+    returns a new document that callers are free to modify.
+    """
+
+    def __init__(self, content, etag=None, last_modified=None, stored_at=None):
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = time.time() if stored_at is None else stored_at
+
+    @classmethod
+    def from_response(cls, response):
+        return cls(
+            content=response.content,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+
+    def is_fresh(self, ttl):
+        """Check if the entry can be used without revalidating with the server."""
+        return ttl is not None and time.time() - self.stored_at < ttl
+
+    def get_validators(self):
+        """Build the conditional request headers for revalidating the entry."""
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class BaseCache:
+    """Base class for response caches.
+
+    Entries are used without contacting the server for ttl seconds. After that
+    they are revalidated with If-None-Match/If-Modified-Since if the server
+    provided an ETag or Last-Modified header, otherwise they are refetched.
+    """
+
+    def __init__(self, ttl=300, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @staticmethod
+    def get_key(path, params=None, base_url=None):
+        """Build a cache key from the request path and query params.
+
+        Provide the client base_url so that clients of different farms can
+        share a cache.
+        """
+        # Paths of pagination links start with a slash, resource paths do not.
+        path = str(path).lstrip("/")
+        if base_url is not None:
+            path = f"{str(base_url).rstrip('/')}/{path}"
+        if not params:
+            return path
+        query = urlencode(sorted(params.items(), key=lambda item: item[0]), doseq=True)
+        return path + ("&" if "?" in path else "?") + query
+
+    @staticmethod
+    def is_cacheable(response):
+        return response.status_code == 200 and "no-store" not in response.headers.get(
+            "Cache-Control", ""
+        )
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, entry):
+        raise NotImplementedError
+
+    def invalidate(self, prefix):
+        """Remove all entries with a key that starts with the prefix."""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryCache(BaseCache):
+    """An in-memory LRU response cache."""
+
+    def __init__(self, ttl=300, max_entries=1024):
+        super().__init__(ttl=ttl, max_entries=max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, prefix):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache(BaseCache):
+    """An on-disk LRU response cache stored in a sqlite database.
+
+    The database can be shared between processes so that new workers start
+    with a warm cache.
+    """
+
+    def __init__(self, path, ttl=300, max_entries=10000):
+        super().__init__(ttl=ttl, max_entries=max_entries)
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, content BLOB, etag TEXT, last_modified TEXT, "
+                "stored_at REAL, accessed_at REAL)"
+            )
+
+    def get(self, key):
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT content, etag, last_modified, stored_at FROM cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE cache SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+        content, etag, last_modified, stored_at = row
+        return CacheEntry(content, etag, last_modified, stored_at)
+
+    def set(self, key, entry):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    entry.content,
+                    entry.etag,
+                    entry.last_modified,
+                    entry.stored_at,
+                    time.time(),
+                ),
+            )
+            self._connection.execute(
+                "DELETE FROM cache WHERE key NOT IN "
+                "(SELECT key FROM cache ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def invalidate(self, prefix):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM cache WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            )
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM cache")
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
@@ -0,0 +1,83 @@
+import json
+import os
+
+
+class Checkpoint:
+    """The position of an iteration, so that an interrupted iteration can be resumed.
+
+    The state holds the query being iterated, the pagination link of the
+    current page (None for the first page) and the number of resources of that
+    page that have been consumed. It is updated for each resource and saved
+    after each page: written to a JSON file if path is provided and passed to
+    callback if provided. Call save() to also record the position within the
+    current page, eg: after an error.
+    """
+
+    def __init__(self, path=None, callback=None, state=None):
+        self.path = path
+        self.callback = callback
+        self.state = dict(state or {})
+
+        # Resume from a previously saved checkpoint.
+        if not self.state and path is not None and os.path.exists(path):
+            self.load()
+
+    @property
+    def url(self):
+        return self.state.get("url")
+
+    @property
+    def index(self):
+        return self.state.get("index", 0)
+
+    @property
+    def done(self):
+        return self.state.get("done", False)
+
+    def start(self, entity_type, bundle=None, params=None):
+        """Start or resume an iteration, checking that the query has not changed."""
+        query = {
+            "entity_type": entity_type,
+            "bundle": bundle,
+            # Normalize the params so they compare equal after a JSON round trip.
+            "params": json.loads(json.dumps(dict(params or {}), default=str)),
+        }
+        if not self.state:
+            self.state = {"query": query, "url": None, "index": 0, "done": False}
+        elif self.state["query"] != query:
+            raise ValueError(
+                f"Checkpoint is for a different iteration: {self.state['query']}"
+            )
+
+    def advance(self, url, index):
+        """Record that index resources of the page at url have been consumed."""
+        self.state["url"] = url
+        self.state["index"] = index
+
+    def next_page(self, url):
+        """Record that a page was consumed and save the checkpoint."""
+        self.state["url"] = url
+        self.state["index"] = 0
+        self.state["done"] = url is None
+        self.save()
+
+    def save(self):
+        if self.path is not None:
+            # Write to a temporary file first so a crash can not corrupt the file.
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as checkpoint_file:
+                json.dump(self.state, checkpoint_file)
+            os.replace(temp_path, self.path)
+        if self.callback is not None:
+            self.callback(dict(self.state))
+
+    def load(self, path=None):
+        path = path or self.path
+        with open(path) as checkpoint_file:
+            self.state = json.load(checkpoint_file)
+
+    def reset(self):
+        """Clear the checkpoint so the next iteration starts from the beginning."""
+        self.state = {}
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,95 @@
+import json
+
+# JSON codecs used to encode request bodies and decode response bodies. The
+# fastest installed backend is used by default: orjson, then msgspec, then the
+# standard library json module.
+
+
+class JSONCodec:
+    """Codec using the standard library json module."""
+
+    name = "json"
+
+    # Reuse one compact encoder, json.dumps creates one per call with separators.
+    _encoder = json.JSONEncoder(separators=(",", ":"))
+
+    @classmethod
+    def dumps(cls, obj):
+        return cls._encoder.encode(obj).encode()
+
+    @staticmethod
+    def loads(data):
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """Codec using orjson."""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def dumps(self, obj):
+        return self._orjson.dumps(obj)
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+
+class MsgspecCodec:
+    """Codec using msgspec."""
+
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+        self._decode_error = msgspec.DecodeError
+
+    def dumps(self, obj):
+        return self._encoder.encode(obj)
+
+    def loads(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        try:
+            return self._decoder.decode(data)
+        except self._decode_error as e:
+            # Raise a ValueError like the other codecs.
+            raise ValueError(str(e)) from e
+
+
+CODECS = {
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+    "json": JSONCodec,
+}
+
+
+def get_codec(codec=None):
+    """Get a codec instance by name, or the fastest installed codec if None.
+
+    Codec instances are returned unchanged so that custom codecs providing
+    dumps() and loads() methods can be used.
+    """
+
+    if codec is None:
+        for codec_class in CODECS.values():
+            try:
+                return codec_class()
+            except ImportError:
+                continue
+
+    if isinstance(codec, str):
+        if codec not in CODECS:
+            raise ValueError(
+                f"Unknown codec: {codec}. Available codecs are: {', '.join(CODECS)}"
+            )
+        return CODECS[codec]()
+
+    return codec
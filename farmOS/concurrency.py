@@ -0,0 +1,122 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Concurrency primitives shared by the async and sync clients. The async
+# classes are prefixed with "Async" so that unasync.py maps them onto their
+# sync counterparts when generating farmOS/_sync.
+
+
+class AsyncWorkerPool:
+    """Run coroutine functions concurrently with a bound on calls in flight."""
+
+    def __init__(self, max_workers):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+        self.max_workers = max_workers
+
+    async def imap(self, func, items):
+        """Yield func(item) for each item in order, keeping up to max_workers calls in flight.
+
+        Items are consumed lazily so an unbounded iterable can be used. Calls
+        still in flight are cancelled when the generator is closed early.
+        """
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(asyncio.ensure_future(func(item)))
+                if len(pending) >= self.max_workers:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def map(self, func, items, return_exceptions=False):
+        """Return a list of func(item) for each item, in order.
+
+        If return_exceptions is True, exceptions are returned in place of
+        results instead of being raised.
+        """
+        if return_exceptions:
+            func = _AsyncCaptureExceptions(func)
+        return [result async for result in self.imap(func, items)]
+
+
+class _AsyncCaptureExceptions:
+    def __init__(self, func):
+        self.func = func
+
+    async def __call__(self, item):
+        try:
+            return await self.func(item)
+        except Exception as e:
+            return e
+
+
+class WorkerPool:
+    """Run functions concurrently in a thread pool with a bound on calls in flight."""
+
+    def __init__(self, max_workers):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+        self.max_workers = max_workers
+
+    def imap(self, func, items):
+        """Yield func(item) for each item in order, keeping up to max_workers calls in flight.
+
+        Items are consumed lazily so an unbounded iterable can be used. Calls
+        that have not started are cancelled when the generator is closed early.
+        """
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                for item in items:
+                    pending.append(executor.submit(func, item))
+                    if len(pending) >= self.max_workers:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def map(self, func, items, return_exceptions=False):
+        """Return a list of func(item) for each item, in order.
+
+        If return_exceptions is True, exceptions are returned in place of
+        results instead of being raised.
+        """
+        if return_exceptions:
+            func = _CaptureExceptions(func)
+        return list(self.imap(func, items))
+
+
+class _CaptureExceptions:
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, item):
+        try:
+            return self.func(item)
+        except Exception as e:
+            return e
+
+
+class AsyncClock:
+    """Wait between requests, eg: before a retry."""
+
+    @staticmethod
+    async def sleep(seconds):
+        await asyncio.sleep(seconds)
+
+
+class Clock:
+    """Wait between requests, eg: before a retry."""
+
+    @staticmethod
+    def sleep(seconds):
+        time.sleep(seconds)
@@ -1,12 +1,14 @@
+from itertools import count
+
+
 def filter(path, value, operation="="):
     """Helper method to build JSONAPI filter query params."""
 
     # TODO: Validate path, value, operation?
-    # TODO: Support filter groups.
+    # Use Condition, And and Or to build filter groups.
     # TODO: Support revision filters, are these edge cases?
-    # TODO: Support "pagination" query params? Separate method?
-    # TODO: Support "sort" query params? Separate method?
-    # TODO: Support "includes" query params? Separate method?
+    # Pagination, sort, include and sparse fieldset params are built with
+    # farmOS.query.Query.
 
     filters = {}
 
@@ -16,8 +18,8 @@ def filter(path, value, operation="="):
         filters[param] = value
     # Else we need a query param for the path, operation, and value.
     else:
-        # TODO: Use a unique identifier instead of using "condition"
-        # otherwise the same path cannot be filtered multiple times.
+        # The same path and operation can only be filtered once. Use Condition
+        # to filter the same path multiple times.
         base_param = f"filter[{path}_{operation.lower()}][condition]"
 
         path_param = base_param + "[path]"
@@ -32,3 +34,134 @@ def filter(path, value, operation="="):
         filters[value_param] = value
 
     return filters
+
+
+# Condition trees for filters that use the same path more than once or
+# combine conditions with AND/OR groups.
+# https://www.drupal.org/docs/core-modules-and-themes/core-modules/jsonapi-module/filtering
+
+OPERATORS = [
+    "=",
+    "<>",
+    ">",
+    ">=",
+    "<",
+    "<=",
+    "STARTS_WITH",
+    "CONTAINS",
+    "ENDS_WITH",
+    "IN",
+    "NOT IN",
+    "BETWEEN",
+    "NOT BETWEEN",
+    "IS NULL",
+    "IS NOT NULL",
+]
+ARRAY_OPERATORS = ["IN", "NOT IN", "BETWEEN", "NOT BETWEEN"]
+NULL_OPERATORS = ["IS NULL", "IS NOT NULL"]
+
+
+class FilterNode:
+    """Base class for filter conditions and groups."""
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def params(self, prefix=""):
+        """Compile the filter into JSONAPI filter query params.
+
+        Each condition and group is given a unique id. Provide a prefix to
+        combine the params of several filters in one request.
+        """
+        params = {}
+        self._compile(params, prefix, {"c": count(1), "g": count(1)}, None)
+        return params
+
+    def _compile(self, params, prefix, ids, member_of):
+        raise NotImplementedError
+
+
+class Condition(FilterNode):
+    """A filter condition on a single path."""
+
+    def __init__(self, path, value=None, operator="="):
+        operator = operator.upper()
+        if operator not in OPERATORS:
+            raise ValueError(f"Unsupported filter operator: {operator}")
+
+        if operator in NULL_OPERATORS:
+            if value is not None:
+                raise ValueError(f"The {operator} operator does not accept a value.")
+        elif value is None:
+            raise ValueError("A value is required. Use IS NULL to filter null values.")
+        elif operator in ARRAY_OPERATORS:
+            value = list(value)
+            if "BETWEEN" in operator and len(value) != 2:
+                raise ValueError(f"The {operator} operator requires two values.")
+
+        self.path = path
+        self.value = value
+        self.operator = operator
+
+    def _compile(self, params, prefix, ids, member_of):
+        base_param = f"filter[{prefix}c{next(ids['c'])}][condition]"
+        params[base_param + "[path]"] = self.path
+        params[base_param + "[operator]"] = self.operator
+        if self.operator in ARRAY_OPERATORS:
+            params[base_param + "[value][]"] = self.value
+        elif self.operator not in NULL_OPERATORS:
+            params[base_param + "[value]"] = self.value
+        if member_of is not None:
+            params[base_param + "[memberOf]"] = member_of
+
+    def __repr__(self):
+        return f"Condition({self.path!r}, {self.value!r}, {self.operator!r})"
+
+
+class Group(FilterNode):
+    """A group of conditions and groups combined with an AND or OR conjunction."""
+
+    def __init__(self, conjunction, *members):
+        conjunction = conjunction.upper()
+        if conjunction not in ["AND", "OR"]:
+            raise ValueError(f"Unsupported group conjunction: {conjunction}")
+        if not members:
+            raise ValueError("A filter group requires at least one member.")
+        self.conjunction = conjunction
+        self.members = list(members)
+
+    def _compile(self, params, prefix, ids, member_of):
+        group_id = f"{prefix}g{next(ids['g'])}"
+        base_param = f"filter[{group_id}][group]"
+        params[base_param + "[conjunction]"] = self.conjunction
+        if member_of is not None:
+            params[base_param + "[memberOf]"] = member_of
+        for member in self.members:
+            member._compile(params, prefix, ids, group_id)
+
+    def __repr__(self):
+        members = ", ".join(repr(member) for member in self.members)
+        return f"{type(self).__name__}({self.conjunction!r}, {members})"
+
+
+class And(Group):
+    """A group of filters that must all match."""
+
+    def __init__(self, *members):
+        super().__init__("AND", *members)
+
+    def __repr__(self):
+        return f"And({', '.join(repr(member) for member in self.members)})"
+
+
+class Or(Group):
+    """A group of filters where at least one must match."""
+
+    def __init__(self, *members):
+        super().__init__("OR", *members)
+
+    def __repr__(self):
+        return f"Or({', '.join(repr(member) for member in self.members)})"
@@ -0,0 +1,201 @@
+import json
+import re
+
+# Incremental parser for JSONAPI documents. Items of the primary "data" array
+# are returned as soon as they are complete so that a page of resources can be
+# processed without holding the full response body or document in memory.
+
+_STRING_SPECIAL = re.compile(rb'["\\]')
+_WHITESPACE = frozenset(b" \t\r\n")
+_QUOTE = ord('"')
+_BACKSLASH = ord("\\")
+_COMMA = ord(",")
+_COLON = ord(":")
+_OPEN = frozenset(b"{[")
+_CLOSE = frozenset(b"}]")
+_OPEN_BRACKET = ord("[")
+_CLOSE_BRACKET = ord("]")
+
+
+class JSONAPIStreamParser:
+    """Incrementally parse a JSONAPI document fed in chunks of bytes.
+
+    feed() returns the items of the top level "data" array that were completed
+    by the chunk. All other top level members (links, meta, included...) are
+    decoded into the document dict. Only the bytes of the item or member that
+    is currently being parsed are buffered.
+    """
+
+    data_key = "data"
+
+    def __init__(self, loads=json.loads):
+        self.document = {}
+        self._loads = loads
+        self._buffer = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._done = False
+        # Top level member state.
+        self._key = None
+        self._key_start = None
+        self._expect_value = False
+        self._value_start = None
+        # Primary data array state.
+        self._in_data = False
+        self._item_start = None
+
+    def feed(self, chunk):
+        """Parse a chunk of bytes and return a list of the completed data items."""
+        buffer = self._buffer
+        buffer += chunk
+        items = []
+        end = len(buffer)
+        i = self._pos
+        while i < end:
+            if self._in_string:
+                next_i = self._skip_string(buffer, i, end)
+                # Wait for more data if an escaped character is incomplete.
+                if next_i is None:
+                    break
+                i = next_i
+                continue
+
+            c = buffer[i]
+            if c not in _WHITESPACE:
+                self._handle_token(buffer, i, c, items)
+            i += 1
+
+        self._compact(i)
+        return items
+
+    def close(self):
+        """Check that a complete document was parsed."""
+        if not self._done:
+            raise ValueError("Incomplete JSON document.")
+        return self.document
+
+    def _skip_string(self, buffer, i, end):
+        """Return the position after the string characters in the buffer, or None."""
+        match = _STRING_SPECIAL.search(buffer, i)
+        if match is None:
+            return end
+        i = match.start()
+        if buffer[i] == _BACKSLASH:
+            if i + 1 >= end:
+                return None
+            return i + 2
+        self._in_string = False
+        if self._key_start is not None:
+            start = self._key_start
+            key_end = i + 1
+            self._key = self._loads(bytes(buffer[start:key_end]))
+            self._key_start = None
+        return i + 1
+
+    def _handle_token(self, buffer, i, c, items):
+        depth = self._depth
+        self._mark_start(i, c, depth)
+        if c == _QUOTE:
+            self._in_string = True
+            if depth == 1 and self._key is None:
+                self._key_start = i
+        elif c in _OPEN:
+            self._depth += 1
+        elif c in _CLOSE:
+            self._close(buffer, i, items)
+        elif c == _COMMA:
+            self._comma(buffer, i, depth, items)
+        elif c == _COLON and depth == 1:
+            self._expect_value = True
+
+    def _mark_start(self, i, c, depth):
+        """Record the start of a top level member value or a data item."""
+        if self._expect_value:
+            self._expect_value = False
+            if self._key == self.data_key and c == _OPEN_BRACKET:
+                self._in_data = True
+            else:
+                self._value_start = i
+        elif (
+            self._in_data
+            and depth == 2
+            and self._item_start is None
+            and c != _COMMA
+            and c != _CLOSE_BRACKET
+        ):
+            self._item_start = i
+
+    def _close(self, buffer, i, items):
+        self._depth -= 1
+        if self._in_data and self._depth == 1:
+            if self._item_start is not None:
+                items.append(self._end_item(buffer, i))
+            self._in_data = False
+        elif self._depth == 0:
+            self._end_member(buffer, i)
+            self._done = True
+
+    def _comma(self, buffer, i, depth, items):
+        if self._in_data and depth == 2:
+            items.append(self._end_item(buffer, i))
+        elif depth == 1:
+            self._end_member(buffer, i)
+
+    def _end_item(self, buffer, end):
+        start = self._item_start
+        item = self._loads(bytes(buffer[start:end]))
+        self._item_start = None
+        return item
+
+    def _end_member(self, buffer, end):
+        start = self._value_start
+        if start is not None:
+            self._add_member(self._key, self._loads(bytes(buffer[start:end])))
+        self._key = None
+        self._value_start = None
+
+    def _add_member(self, key, value):
+        self.document[key] = value
+
+    def _compact(self, pos):
+        """Drop parsed bytes that are no longer needed from the buffer."""
+        starts = [
+            start
+            for start in (self._key_start, self._value_start, self._item_start)
+            if start is not None
+        ]
+        keep = min(starts, default=pos)
+        if keep:
+            del self._buffer[:keep]
+            if self._key_start is not None:
+                self._key_start -= keep
+            if self._value_start is not None:
+                self._value_start -= keep
+            if self._item_start is not None:
+                self._item_start -= keep
+        self._pos = pos - keep
+
+
+class JSONObjectStreamParser(JSONAPIStreamParser):
+    """Incrementally parse a JSON object fed in chunks of bytes.
+
+    feed() returns a list of (key, value) tuples of the top level members that
+    were completed by the chunk, eg: the subresponses of a subrequests response.
+    Members are not kept in the document.
+    """
+
+    data_key = None
+
+    def __init__(self, loads=json.loads):
+        super().__init__(loads)
+        self._members = []
+
+    def feed(self, chunk):
+        super().feed(chunk)
+        members = self._members
+        self._members = []
+        return members
+
+    def _add_member(self, key, value):
+        self._members.append((key, value))
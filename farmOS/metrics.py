@@ -0,0 +1,332 @@
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+# Request instrumentation. Clients emit a RequestEvent to each of their hooks
+# after every request. Metrics is a hook that aggregates events into
+# per-endpoint histograms, which can be rendered in the Prometheus text format
+# or pushed to a collector.
+
+
+class RequestEvent:
+    """Measurements of one request made by a farmOS client.
+
+    seconds is the time from sending the request until the response body was
+    received and decode_seconds the time spent decoding the body. Responses
+    served from the client cache without making a request are marked as cached.
+    """
+
+    def __init__(
+        self,
+        operation,
+        method,
+        endpoint,
+        entity_type=None,
+        bundle=None,
+        status=None,
+        size=0,
+        seconds=0.0,
+        decode_seconds=0.0,
+        cached=False,
+    ):
+        self.operation = operation
+        self.method = method
+        self.endpoint = endpoint
+        self.entity_type = entity_type
+        self.bundle = bundle
+        self.status = status
+        self.size = size
+        self.seconds = seconds
+        self.decode_seconds = decode_seconds
+        self.cached = cached
+
+    @classmethod
+    def from_response(
+        cls,
+        response,
+        seconds,
+        operation,
+        endpoint,
+        entity_type=None,
+        bundle=None,
+        size=None,
+    ):
+        """Create an event from a response that has been read."""
+        return cls(
+            operation,
+            response.request.method,
+            endpoint,
+            entity_type,
+            bundle,
+            status=response.status_code,
+            size=len(response.content) if size is None else size,
+            seconds=seconds,
+        )
+
+    def __repr__(self):
+        return (
+            f"RequestEvent(operation={self.operation!r}, method={self.method!r}, "
+            f"endpoint={self.endpoint!r}, status={self.status}, size={self.size}, "
+            f"seconds={self.seconds:.3f}, decode_seconds={self.decode_seconds:.3f})"
+        )
+
+
+def emit(client, event):
+    """Call each hook of a client with an event."""
+    for hook in getattr(client, "hooks", ()):
+        hook(event)
+
+
+class Histogram:
+    """A histogram of observed values with cumulative Prometheus style buckets."""
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Return a list of (upper bound, cumulative count) pairs ending with +Inf."""
+        total = 0
+        pairs = []
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating within its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        lower = 0.0
+        previous = 0
+        for bound, total in self.cumulative():
+            if total >= rank:
+                if bound == float("inf"):
+                    return lower
+                fraction = (rank - previous) / (total - previous)
+                return lower + (bound - lower) * fraction
+            lower, previous = bound, total
+        return lower
+
+    def copy(self):
+        histogram = Histogram(self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.count = self.count
+        histogram.sum = self.sum
+        return histogram
+
+
+class EndpointMetrics:
+    """Aggregated measurements of the requests of one operation and endpoint."""
+
+    def __init__(self, buckets):
+        self.seconds = Histogram(buckets)
+        self.decode_seconds = Histogram(buckets)
+        self.statuses = Counter()
+        self.bytes = 0
+        self.cached = 0
+
+    def observe(self, event):
+        self.statuses[event.status] += 1
+        self.bytes += event.size
+        self.decode_seconds.observe(event.decode_seconds)
+        if event.cached:
+            self.cached += 1
+        else:
+            self.seconds.observe(event.seconds)
+
+
+class MetricPoint:
+    """A metric value with its labels. Histogram values are Histogram copies."""
+
+    def __init__(self, name, kind, labels, value):
+        self.name = name
+        self.kind = kind
+        self.labels = labels
+        self.value = value
+
+    def __repr__(self):
+        return f"MetricPoint({self.name!r}, {self.kind!r}, {self.labels!r}, {self.value!r})"
+
+
+class Metrics:
+    """Client hook that aggregates request events per operation and endpoint.
+
+    Latency and decode time are recorded in histograms, along with the number of
+    requests by status, the bytes received and the number of cached responses.
+    Cached responses are not included in the latency histogram.
+    """
+
+    def __init__(self, buckets=Histogram.DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        key = (event.operation, event.method, event.endpoint)
+        with self._lock:
+            endpoint = self.endpoints.get(key)
+            if endpoint is None:
+                endpoint = self.endpoints[key] = EndpointMetrics(self.buckets)
+            endpoint.observe(event)
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+
+    def summary(self):
+        """Return a dict of request count, bytes and latency quantiles per endpoint."""
+        with self._lock:
+            return {
+                key: {
+                    "requests": sum(endpoint.statuses.values()),
+                    "cached": endpoint.cached,
+                    "bytes": endpoint.bytes,
+                    "p50": endpoint.seconds.quantile(0.5),
+                    "p95": endpoint.seconds.quantile(0.95),
+                    "decode_p50": endpoint.decode_seconds.quantile(0.5),
+                }
+                for key, endpoint in self.endpoints.items()
+            }
+
+    def collect(self):
+        """Return a snapshot of the aggregated metrics as a list of MetricPoint."""
+        points = []
+        with self._lock:
+            for (operation, method, endpoint_path), endpoint in self.endpoints.items():
+                labels = {
+                    "operation": operation,
+                    "method": method,
+                    "endpoint": endpoint_path,
+                }
+                for status, count in sorted(
+                    endpoint.statuses.items(), key=lambda item: str(item[0])
+                ):
+                    points.append(
+                        MetricPoint(
+                            "farmos_client_requests_total",
+                            "counter",
+                            {**labels, "status": str(status)},
+                            count,
+                        )
+                    )
+                points.extend(
+                    [
+                        MetricPoint(
+                            "farmos_client_request_seconds",
+                            "histogram",
+                            labels,
+                            endpoint.seconds.copy(),
+                        ),
+                        MetricPoint(
+                            "farmos_client_decode_seconds",
+                            "histogram",
+                            labels,
+                            endpoint.decode_seconds.copy(),
+                        ),
+                        MetricPoint(
+                            "farmos_client_response_bytes_total",
+                            "counter",
+                            labels,
+                            endpoint.bytes,
+                        ),
+                        MetricPoint(
+                            "farmos_client_cached_responses_total",
+                            "counter",
+                            labels,
+                            endpoint.cached,
+                        ),
+                    ]
+                )
+        return points
+
+
+class PrometheusExporter:
+    """Render metrics in the Prometheus text exposition format."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def render(self):
+        # Group the points of each metric after its TYPE line.
+        families = {}
+        for point in self.metrics.collect():
+            families.setdefault(point.name, []).append(point)
+
+        lines = []
+        for name, points in families.items():
+            lines.append(f"# TYPE {name} {points[0].kind}")
+            lines.extend(self._format_point(point) for point in points)
+        return "\n".join(lines) + "\n"
+
+    def _format_point(self, point):
+        lines = []
+        if point.kind == "histogram":
+            for bound, count in point.value.cumulative():
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                labels = self._format_labels({**point.labels, "le": le})
+                lines.append(f"{point.name}_bucket{labels} {count}")
+            labels = self._format_labels(point.labels)
+            lines.append(f"{point.name}_sum{labels} {point.value.sum}")
+            lines.append(f"{point.name}_count{labels} {point.value.count}")
+        else:
+            labels = self._format_labels(point.labels)
+            lines.append(f"{point.name}{labels} {point.value}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _format_labels(labels):
+        values = []
+        for name, value in labels.items():
+            value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+            values.append(f'{name}="{value}"')
+        return "{" + ",".join(values) + "}"
+
+
+class PushExporter:
+    """Push metric snapshots to a collector, in the style of OpenTelemetry.
+
+    The collector must provide an export(points) method. An OpenTelemetry or
+    other metrics backend can be used by wrapping it in such a collector.
+    """
+
+    def __init__(self, metrics, collector):
+        self.metrics = metrics
+        self.collector = collector
+
+    def export(self):
+        points = self.metrics.collect()
+        self.collector.export(points)
+        return len(points)
+
+
+class InMemoryCollector:
+    """Collector that keeps exported metric points in memory, for testing."""
+
+    def __init__(self):
+        self.exports = []
+
+    def export(self, points):
+        self.exports.append(points)
+
+    @property
+    def points(self):
+        """The points of the latest export."""
+        return self.exports[-1] if self.exports else []
+
+    def get(self, name, **labels):
+        """Return the value of the latest exported point matching a name and labels."""
+        for point in self.points:
+            if point.name == name and labels.items() <= point.labels.items():
+                return point.value
+        return None
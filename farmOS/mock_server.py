@@ -0,0 +1,760 @@
+import asyncio
+import json
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from operator import eq, ge, gt, le, lt, ne
+from urllib.parse import parse_qsl, urlencode
+
+import httpx
+
+# An in-process stand-in for a farmOS server, served through an httpx
+# MockTransport. It implements enough of JSON:API, subrequests and OAuth for
+# the client to be tested and benchmarked without a farmOS site.
+
+JSONAPI_CONTENT_TYPE = "application/vnd.api+json"
+
+# Subrequests actions and the HTTP methods they resolve into.
+SUBREQUEST_METHODS = {
+    "view": "GET",
+    "create": "POST",
+    "update": "PATCH",
+    "replace": "PUT",
+    "delete": "DELETE",
+    "exists": "HEAD",
+    "discover": "OPTIONS",
+}
+
+# Replacement tokens in subrequests, eg: {{create-asset.body@$.data.id}}
+TOKEN_PATTERN = re.compile(r"\{\{([^{}]+?)\.(body|headers)@([^{}]+)\}\}")
+
+# Filter operators compared with a single value, or with a list of values.
+OPERATORS = {
+    "=": eq,
+    "<>": ne,
+    ">": gt,
+    ">=": ge,
+    "<": lt,
+    "<=": le,
+    "CONTAINS": lambda value, other: str(other) in str(value),
+    "STARTS_WITH": lambda value, other: str(value).startswith(str(other)),
+    "ENDS_WITH": lambda value, other: str(value).endswith(str(other)),
+}
+LIST_OPERATORS = {
+    "IN": lambda value, expected: value in expected,
+    "NOT IN": lambda value, expected: value not in expected,
+    "BETWEEN": lambda value, expected: expected[0] <= value <= expected[1],
+    "NOT BETWEEN": lambda value, expected: not expected[0] <= value <= expected[1],
+}
+
+FILTER_PARAM = re.compile(r"^filter\[([^\]]+)\](.*)$")
+FILTER_MEMBER = re.compile(r"^\[(condition|group)\]\[(\w+)\](\[\])?$")
+
+
+class MockFarmServer:
+    """An in-process farmOS server for tests and benchmarks.
+
+    Resources are stored in memory and served at api/{entity_type}/{bundle}
+    with offset pagination of up to max_page_size resources, filter, sort,
+    include and sparse fieldset params. The server also implements the
+    subrequests endpoint, the api info endpoint and an oauth/token endpoint
+    that issues bearer tokens. If require_auth is True, api requests without
+    a token that was issued return a 401 response.
+
+    Every response is delayed by latency seconds plus per_resource_latency
+    seconds for each resource it contains. Each request is recorded in
+    requests. A validator can be provided to reject resources that are
+    created or updated: it is called with the resource and returns an error
+    message, or None if the resource is valid.
+    """
+
+    def __init__(
+        self,
+        hostname="http://farmos.test",
+        max_page_size=50,
+        latency=0,
+        per_resource_latency=0,
+        require_auth=False,
+        validator=None,
+    ):
+        self.hostname = hostname.rstrip("/")
+        self.max_page_size = max_page_size
+        self.latency = latency
+        self.per_resource_latency = per_resource_latency
+        self.require_auth = require_auth
+        self.validator = validator
+        self.requests = []
+        self.tokens = set()
+
+        # Resources by resource type, then by id, in creation order.
+        self.resources = {}
+        self._internal_ids = {}
+        self._clock = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        # Filtered and sorted query results, cleared when a resource changes.
+        self._query_cache = {}
+        self._lock = threading.RLock()
+
+    def transport(self):
+        """Return a transport for a FarmClient or httpx.Client."""
+        return httpx.MockTransport(self.handle)
+
+    def async_transport(self):
+        """Return a transport for an AsyncFarmClient that does not block the event loop."""
+        return httpx.MockTransport(self.handle_async)
+
+    def client(self, **kwargs):
+        """Return a FarmClient connected to the server."""
+        from farmOS import FarmClient
+
+        return FarmClient(self.hostname, transport=self.transport(), **kwargs)
+
+    def async_client(self, **kwargs):
+        """Return an AsyncFarmClient connected to the server."""
+        from farmOS import AsyncFarmClient
+
+        return AsyncFarmClient(
+            self.hostname, transport=self.async_transport(), **kwargs
+        )
+
+    def add(self, entity_type, bundle=None, attributes=None, relationships=None):
+        """Add a resource to the server and return it."""
+        if bundle is None:
+            bundle = entity_type
+        with self._lock:
+            resource = self._create(
+                f"{entity_type}--{bundle}",
+                {"attributes": attributes or {}, "relationships": relationships or {}},
+            )
+        if isinstance(resource, httpx.Response):
+            raise ValueError(resource.json()["errors"][0]["detail"])
+        return resource
+
+    def populate(self, entity_type, bundle=None, count=0, attributes=None):
+        """Add count resources and return them.
+
+        attributes can be a dict, or a callable that is given the index of each
+        resource and returns its attributes. By default resources are named
+        after their index.
+        """
+        resources = []
+        for index in range(count):
+            if callable(attributes):
+                resource_attributes = attributes(index)
+            elif attributes is not None:
+                resource_attributes = dict(attributes)
+            else:
+                resource_attributes = {"name": f"{bundle or entity_type} {index}"}
+            resources.append(self.add(entity_type, bundle, resource_attributes))
+        return resources
+
+    def get_resources(self, entity_type, bundle=None):
+        """Return the resources of a type in creation order."""
+        if bundle is None:
+            bundle = entity_type
+        return list(self.resources.get(f"{entity_type}--{bundle}", {}).values())
+
+    def handle(self, request):
+        """Handle a request, sleeping to simulate latency."""
+        response, count = self._handle(request)
+        delay = self.latency + self.per_resource_latency * count
+        if delay > 0:
+            time.sleep(delay)
+        return response
+
+    async def handle_async(self, request):
+        """Handle a request, sleeping asynchronously to simulate latency."""
+        response, count = self._handle(request)
+        delay = self.latency + self.per_resource_latency * count
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return response
+
+    def _handle(self, request):
+        """Helper function that returns a response and the number of resources in it."""
+        self.requests.append(request)
+        path = request.url.path.strip("/")
+
+        if path == "oauth/token":
+            return self._handle_token(request), 0
+
+        if self.require_auth and not self._is_authorized(request):
+            return self._error_response(401, "Unauthorized"), 0
+
+        if path == "subrequests":
+            return self._handle_subrequests(request)
+        return self._dispatch(request)
+
+    def _dispatch(self, request):
+        """Helper function that routes a JSON:API request."""
+        path = request.url.path.strip("/").split("/")
+        if path == ["api"] and request.method == "GET":
+            return self._json_response(200, self._get_info()), 0
+        if len(path) not in (3, 4) or path[0] != "api":
+            return self._error_response(404, "Not Found"), 0
+
+        resource_type = f"{path[1]}--{path[2]}"
+        params = parse_qsl(request.url.query.decode(), keep_blank_values=True)
+        with self._lock:
+            if len(path) == 3:
+                if request.method == "GET":
+                    return self._get_collection(request, resource_type, params)
+                if request.method == "POST":
+                    return self._post(request, resource_type), 1
+                return self._error_response(405, "Method Not Allowed"), 0
+
+            id = path[3]
+            resource = self.resources.get(resource_type, {}).get(id)
+            if resource is None:
+                return self._error_response(404, f"{resource_type} {id} not found."), 0
+            if request.method == "GET":
+                document = {"data": self._get_fields(resource, params)}
+                included = self._get_included([resource], params)
+                if included is not None:
+                    document["included"] = included
+                return self._json_response(200, document), 1
+            if request.method in ("PATCH", "PUT"):
+                return self._patch(request, resource), 1
+            if request.method == "DELETE":
+                del self.resources[resource_type][id]
+                self._query_cache.clear()
+                return httpx.Response(204), 0
+        return self._error_response(405, "Method Not Allowed"), 0
+
+    def _handle_token(self, request):
+        """Helper function that issues a bearer token."""
+        if request.method != "POST":
+            return self._error_response(405, "Method Not Allowed")
+        form = dict(parse_qsl(request.content.decode()))
+        if form.get("grant_type") not in (
+            "password",
+            "client_credentials",
+            "refresh_token",
+        ):
+            return httpx.Response(400, json={"error": "unsupported_grant_type"})
+
+        token = uuid.uuid4().hex
+        self.tokens.add(token)
+        return httpx.Response(
+            200,
+            json={
+                "token_type": "Bearer",  # nosec B105
+                "expires_in": 3600,
+                "access_token": token,
+                "refresh_token": uuid.uuid4().hex,
+            },
+        )
+
+    def _is_authorized(self, request):
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        return scheme == "Bearer" and token in self.tokens
+
+    def _get_info(self):
+        links = {"self": {"href": f"{self.hostname}/api"}}
+        for resource_type in self.resources:
+            entity_type, bundle = resource_type.split("--")
+            links[resource_type] = {
+                "href": f"{self.hostname}/api/{entity_type}/{bundle}"
+            }
+        return {
+            "jsonapi": {"version": "1.0"},
+            "data": [],
+            "meta": {
+                "links": {"me": {"href": f"{self.hostname}/api/user/user/mock"}},
+                "farm": {
+                    "name": "Mock farm",
+                    "url": self.hostname,
+                    "version": "3.x",
+                    "system_of_measurement": "metric",
+                },
+            },
+            "links": links,
+        }
+
+    def _get_collection(self, request, resource_type, params):
+        """Helper function that returns a page of resources."""
+        query = dict(params)
+        try:
+            offset = int(query.get("page[offset]", 0))
+            limit = min(
+                int(query.get("page[limit]", self.max_page_size)), self.max_page_size
+            )
+        except ValueError:
+            return self._error_response(400, "Invalid page params."), 0
+
+        try:
+            results = self._query(resource_type, params)
+        except (KeyError, TypeError, ValueError) as e:
+            return self._error_response(400, f"Invalid filter or sort: {e}"), 0
+
+        end = offset + limit
+        page = results[offset:end]
+        collection_url = f"{self.hostname}{request.url.path}"
+        links = {"self": {"href": str(request.url)}}
+        if end < len(results):
+            next_params = [
+                (key, value)
+                for key, value in params
+                if key not in ("page[offset]", "page[limit]")
+            ]
+            next_params += [("page[offset]", end), ("page[limit]", limit)]
+            links["next"] = {"href": f"{collection_url}?{urlencode(next_params)}"}
+
+        document = {
+            "jsonapi": {"version": "1.0"},
+            "data": [self._get_fields(resource, params) for resource in page],
+            "links": links,
+        }
+        included = self._get_included(page, params)
+        if included is not None:
+            document["included"] = included
+        return self._json_response(200, document), len(page)
+
+    def _query(self, resource_type, params):
+        """Helper function that returns the filtered and sorted resources of a type."""
+        key = (
+            resource_type,
+            tuple(
+                (name, value)
+                for name, value in params
+                if name.startswith("filter[") or name == "sort"
+            ),
+        )
+        if key not in self._query_cache:
+            resources = self.resources.get(resource_type, {}).values()
+            conditions, groups = self._parse_filters(params)
+            results = [
+                resource
+                for resource in resources
+                if self._match_group(resource, None, conditions, groups)
+            ]
+            sort = dict(params).get("sort")
+            if sort:
+                for field in reversed(sort.split(",")):
+                    descending = field.startswith("-")
+                    path = field.lstrip("-")
+                    results.sort(
+                        key=lambda resource: self._sort_key(resource, path),
+                        reverse=descending,
+                    )
+            self._query_cache[key] = results
+        return self._query_cache[key]
+
+    @staticmethod
+    def _parse_filters(params):
+        """Helper function that parses JSON:API filter params into conditions and groups."""
+        conditions = {}
+        groups = {}
+        for name, value in params:
+            match = FILTER_PARAM.match(name)
+            if match is None:
+                continue
+            id, rest = match.groups()
+            # Shorthand equality filter: filter[path]=value
+            if not rest:
+                conditions[id] = {"path": id, "operator": "=", "value": value}
+                continue
+            member = FILTER_MEMBER.match(rest)
+            if member is None:
+                continue
+            kind, field, is_list = member.groups()
+            target = (conditions if kind == "condition" else groups).setdefault(id, {})
+            if is_list:
+                target.setdefault(field, []).append(value)
+            else:
+                target[field] = value
+        return conditions, groups
+
+    def _match_group(self, resource, group_id, conditions, groups):
+        results = [
+            self._match_condition(resource, condition)
+            for condition in conditions.values()
+            if condition.get("memberOf") == group_id
+        ]
+        results += [
+            self._match_group(resource, id, conditions, groups)
+            for id, group in groups.items()
+            if group.get("memberOf") == group_id
+        ]
+        conjunction = groups[group_id].get("conjunction", "AND") if group_id else "AND"
+        if conjunction.upper() == "OR":
+            return any(results)
+        return all(results)
+
+    def _match_condition(self, resource, condition):
+        operator = condition.get("operator", "=").upper()
+        values = [
+            value
+            for value in self._get_values(resource, condition["path"])
+            if value is not None
+        ]
+        if operator == "IS NULL":
+            return not values
+        if operator == "IS NOT NULL":
+            return bool(values)
+
+        expected = condition.get("value")
+        if not isinstance(expected, list):
+            expected = [expected]
+        return any(self._compare(value, operator, expected) for value in values)
+
+    @staticmethod
+    def _compare(value, operator, expected):
+        """Helper function that compares a resource value with filter values."""
+        expected = [_coerce(value, item) for item in expected]
+        value = _normalize(value, expected[0] if expected else None)
+        if operator in LIST_OPERATORS:
+            return LIST_OPERATORS[operator](value, expected)
+        if operator in OPERATORS:
+            return OPERATORS[operator](value, expected[0])
+        raise ValueError(f"Unsupported operator: {operator}")
+
+    def _get_values(self, resource, path):
+        """Helper function that returns the values of a filter or sort path.
+
+        Paths can be id, an attribute, a property of an attribute such as
+        notes.value, or a relationship followed by id or an attribute of the
+        related resources such as asset.id or asset.name.
+        """
+        field, _, rest = path.partition(".")
+        if field == "id":
+            return [resource["id"]]
+        if field in resource["relationships"]:
+            related = resource["relationships"][field].get("data") or []
+            if isinstance(related, dict):
+                related = [related]
+            if rest in ("", "id"):
+                return [identifier["id"] for identifier in related]
+            return [
+                value
+                for identifier in related
+                for value in self._get_values(self._get_resource(identifier), rest)
+            ]
+
+        value = resource["attributes"].get(field)
+        for key in rest.split(".") if rest else []:
+            value = value.get(key) if isinstance(value, dict) else None
+        return [value]
+
+    def _sort_key(self, resource, path):
+        value = self._get_values(resource, path)[0] if path else None
+        return (value is None, value if value is not None else 0)
+
+    def _get_resource(self, identifier):
+        resource = self.resources.get(identifier.get("type"), {}).get(identifier["id"])
+        return resource or {
+            "id": identifier["id"],
+            "attributes": {},
+            "relationships": {},
+        }
+
+    def _get_included(self, resources, params):
+        """Helper function that returns the included resources, or None."""
+        include = dict(params).get("include")
+        if not include:
+            return None
+
+        included = {}
+        for path in include.split(","):
+            current = resources
+            for field in path.split("."):
+                related = []
+                for resource in current:
+                    data = resource["relationships"].get(field, {}).get("data") or []
+                    for identifier in data if isinstance(data, list) else [data]:
+                        stored = self.resources.get(identifier["type"], {}).get(
+                            identifier["id"]
+                        )
+                        if stored is not None:
+                            related.append(stored)
+                            included.setdefault(stored["id"], stored)
+                current = related
+        return [self._get_fields(resource, params) for resource in included.values()]
+
+    @staticmethod
+    def _get_fields(resource, params):
+        """Helper function that applies sparse fieldset params to a resource."""
+        fields = dict(params).get(f"fields[{resource['type']}]")
+        if fields is None:
+            return resource
+        fields = set(fields.split(","))
+        return {
+            **resource,
+            "attributes": {
+                key: value
+                for key, value in resource["attributes"].items()
+                if key in fields
+            },
+            "relationships": {
+                key: value
+                for key, value in resource["relationships"].items()
+                if key in fields
+            },
+        }
+
+    def _post(self, request, resource_type):
+        data, error = self._get_request_data(request, resource_type)
+        if error is not None:
+            return error
+        resource = self._create(resource_type, data)
+        if isinstance(resource, httpx.Response):
+            return resource
+        return self._json_response(201, {"data": resource})
+
+    def _patch(self, request, resource):
+        data, error = self._get_request_data(request, resource["type"])
+        if error is not None:
+            return error
+        if data.get("id", resource["id"]) != resource["id"]:
+            return self._error_response(400, "The id does not match the URL.")
+
+        updated = {
+            **resource,
+            "attributes": {**resource["attributes"], **(data.get("attributes") or {})},
+            "relationships": {
+                **resource["relationships"],
+                **(data.get("relationships") or {}),
+            },
+        }
+        error = self._validate(updated)
+        if error is not None:
+            return error
+        updated["attributes"]["changed"] = self._tick()
+        self.resources[resource["type"]][resource["id"]] = updated
+        self._query_cache.clear()
+        return self._json_response(200, {"data": updated})
+
+    def _get_request_data(self, request, resource_type):
+        """Helper function that returns the data of a request document, or an error response."""
+        try:
+            data = json.loads(request.content)["data"]
+        except (ValueError, KeyError, TypeError):
+            return None, self._error_response(400, "Invalid JSON:API document.")
+        if data.get("type") != resource_type:
+            return None, self._error_response(
+                409, f"The type {data.get('type')} does not match {resource_type}."
+            )
+        return data, None
+
+    def _create(self, resource_type, data):
+        """Helper function that stores a new resource, or returns an error response."""
+        entity_type = resource_type.split("--")[0]
+        internal_id = self._internal_ids.get(entity_type, 0) + 1
+        timestamp = self._tick()
+        resource = {
+            "type": resource_type,
+            "id": data.get("id") or str(uuid.uuid4()),
+            "attributes": {
+                _get_internal_id_field(entity_type): internal_id,
+                "created": timestamp,
+                "changed": timestamp,
+                **(data.get("attributes") or {}),
+            },
+            "relationships": dict(data.get("relationships") or {}),
+        }
+        error = self._validate(resource)
+        if error is not None:
+            return error
+
+        self._internal_ids[entity_type] = internal_id
+        self.resources.setdefault(resource_type, {})[resource["id"]] = resource
+        self._query_cache.clear()
+        return resource
+
+    def _validate(self, resource):
+        if self.validator is None:
+            return None
+        message = self.validator(resource)
+        if message is None:
+            return None
+        return self._error_response(422, message)
+
+    def _tick(self):
+        """Helper function that advances the server clock by a second and returns it."""
+        self._clock += timedelta(seconds=1)
+        return self._clock.isoformat()
+
+    def _handle_subrequests(self, request):
+        """Helper function that processes a subrequests blueprint."""
+        try:
+            blueprint = json.loads(request.content)
+        except ValueError:
+            return self._error_response(400, "Invalid blueprint."), 0
+
+        # Process subrequests once the subrequests they wait for are done.
+        responses = {}
+        keys = {}
+        pending = list(blueprint)
+        count = 0
+        while pending:
+            ready = [
+                sub
+                for sub in pending
+                if all(id in responses for id in sub.get("waitFor") or [])
+            ]
+            if not ready:
+                return self._error_response(400, "Invalid waitFor dependencies."), 0
+            for sub in ready:
+                pending.remove(sub)
+                key, response, resource_count = self._handle_subrequest(
+                    request, sub, responses
+                )
+                count += resource_count
+                request_id = sub.get("requestId") or key
+                responses[request_id] = response
+                keys[request_id] = key
+
+        subresponses = {
+            keys[id]: {
+                "headers": {
+                    "status": [str(response.status_code)],
+                    "content-type": [
+                        response.headers.get("content-type", JSONAPI_CONTENT_TYPE)
+                    ],
+                },
+                "body": response.text,
+            }
+            for id, response in responses.items()
+        }
+        if dict(request.url.params).get("_format") == "json":
+            return httpx.Response(207, json=subresponses), count
+
+        boundary = uuid.uuid4().hex
+        parts = [
+            f"--{boundary}\r\nContent-Id: <{key}>\r\nStatus: "
+            f"{subresponse['headers']['status'][0]}\r\n\r\n{subresponse['body']}\r\n"
+            for key, subresponse in subresponses.items()
+        ]
+        return (
+            httpx.Response(
+                207,
+                headers={
+                    "Content-Type": f"multipart/related; boundary={boundary}; type=text/html"
+                },
+                content="".join(parts) + f"--{boundary}--",
+            ),
+            count,
+        )
+
+    def _handle_subrequest(self, request, sub, responses):
+        """Helper function that replaces tokens in a subrequest and dispatches it."""
+        request_id = sub.get("requestId") or uuid.uuid4().hex
+        uri = sub.get("uri") or ""
+        body = sub.get("body")
+
+        # Subrequests appends a suffix to the key of a response whose uri or
+        # body contained replacement tokens.
+        key = request_id
+        if TOKEN_PATTERN.search(uri):
+            key = f"{request_id}#uri{{0}}"
+        elif body and TOKEN_PATTERN.search(body):
+            key = f"{request_id}#body{{0}}"
+        uri = self._replace_tokens(uri, responses)
+        if body:
+            body = self._replace_tokens(body, responses)
+
+        method = SUBREQUEST_METHODS.get(sub.get("action"))
+        if method is None:
+            return key, self._error_response(400, "Unsupported action."), 0
+
+        headers = dict(sub.get("headers") or {})
+        url = uri if "://" in uri else f"{self.hostname}/{uri.lstrip('/')}"
+        response, count = self._dispatch(
+            httpx.Request(method, url, headers=headers, content=(body or "").encode())
+        )
+        return key, response, count
+
+    @staticmethod
+    def _replace_tokens(value, responses):
+        """Helper function that replaces {{requestId.body@$.path}} tokens."""
+
+        def replace(match):
+            request_id, part, path = match.groups()
+            response = responses.get(request_id)
+            if response is None:
+                return match.group(0)
+            if part == "headers":
+                data = {key: [value] for key, value in response.headers.items()}
+            else:
+                try:
+                    data = response.json()
+                except ValueError:
+                    return match.group(0)
+            resolved = _get_json_path(data, path)
+            if resolved is None:
+                return match.group(0)
+            return str(resolved)
+
+        return TOKEN_PATTERN.sub(replace, value)
+
+    @staticmethod
+    def _json_response(status, document):
+        return httpx.Response(
+            status,
+            headers={"Content-Type": JSONAPI_CONTENT_TYPE},
+            content=json.dumps(document).encode(),
+        )
+
+    def _error_response(self, status, detail):
+        return self._json_response(
+            status, {"errors": [{"status": str(status), "detail": detail}]}
+        )
+
+
+def _get_internal_id_field(entity_type):
+    if entity_type == "taxonomy_term":
+        return "drupal_internal__tid"
+    if entity_type == "user":
+        return "drupal_internal__uid"
+    return "drupal_internal__id"
+
+
+def _get_json_path(data, path):
+    """Resolve a simple JSONPath such as $.data.id or $.data[0].id."""
+    for key in re.findall(r"[^.\[\]$]+", path):
+        if isinstance(data, list) and key.isdigit() and int(key) < len(data):
+            data = data[int(key)]
+        elif isinstance(data, dict):
+            data = data.get(key)
+        else:
+            return None
+    return data
+
+
+def _parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _coerce(value, item):
+    """Convert a filter param to the type of the resource value it is compared with."""
+    if isinstance(value, bool):
+        return item in (True, "1", "true", "TRUE")
+    if isinstance(value, int):
+        return int(float(item))
+    if isinstance(value, float):
+        return float(item)
+    if isinstance(value, str) and _is_number(item) and _parse_timestamp(value):
+        # Timestamp filters on date attributes such as changed.
+        return float(item)
+    return item
+
+
+def _normalize(value, expected):
+    """Convert a date attribute to a timestamp when it is compared with one."""
+    if isinstance(value, str) and isinstance(expected, float):
+        timestamp = _parse_timestamp(value)
+        if timestamp is not None:
+            return timestamp
+    return value
+
+
+def _is_number(value):
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+    return True
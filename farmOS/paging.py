@@ -0,0 +1,76 @@
+# Page size tuning for iterating over JSONAPI collections. farmOS (Drupal)
+# returns at most 50 resources per page by default, so a larger page[limit] is
+# only honored by servers configured with a higher maximum.
+
+
+class PageStats:
+    """Measurements of one page request."""
+
+    def __init__(self, limit, records, seconds, size):
+        self.limit = limit
+        self.records = records
+        self.seconds = seconds
+        self.size = size
+
+    def __repr__(self):
+        return (
+            f"PageStats(limit={self.limit}, records={self.records}, "
+            f"seconds={self.seconds:.3f}, size={self.size})"
+        )
+
+
+class AdaptivePageSize:
+    """Tune page[limit] while iterating to reach a target time per page.
+
+    After each page the time per record is measured and the limit for the next
+    page is moved towards the number of records that can be returned within
+    target_seconds. If target_bytes is provided the limit is also kept below
+    the number of records that fit in target_bytes. The limit stays within
+    min_limit and max_limit. If the server returns fewer records than requested
+    while more pages remain, the server maximum has been reached and max_limit
+    is lowered to match.
+
+    The current limit and the stats of every page are available from the limit
+    and history attributes.
+    """
+
+    def __init__(
+        self,
+        target_seconds=1.0,
+        target_bytes=None,
+        initial_limit=50,
+        min_limit=1,
+        max_limit=50,
+        smoothing=0.5,
+    ):
+        if not 0 < smoothing <= 1:
+            raise ValueError("smoothing must be greater than 0 and at most 1.")
+        self.target_seconds = target_seconds
+        self.target_bytes = target_bytes
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.smoothing = smoothing
+        self.limit = self._clamp(initial_limit)
+        self.history = []
+
+    def record(self, limit, records, seconds, size, more=True):
+        """Record the stats of a page and return the limit for the next page."""
+        self.history.append(PageStats(limit, records, seconds, size))
+
+        # Respect the page size maximum of the server.
+        if more and 0 < records < limit:
+            self.max_limit = records
+
+        if records and seconds > 0:
+            ideal = self.target_seconds / (seconds / records)
+            if self.target_bytes is not None and size:
+                ideal = min(ideal, self.target_bytes / (size / records))
+            limit = round(self.limit + (ideal - self.limit) * self.smoothing)
+            # Grow gradually since the time per record is not constant.
+            self.limit = self._clamp(min(limit, self.limit * 2))
+        else:
+            self.limit = self._clamp(self.limit)
+        return self.limit
+
+    def _clamp(self, limit):
+        return max(self.min_limit, min(self.max_limit, limit))
@@ -0,0 +1,100 @@
+from collections.abc import Mapping
+
+from farmOS.filter import And, Condition
+
+
+class Query(Mapping):
+    """Builder for JSONAPI query params.
+
+    Composes filter, sort, pagination, include and sparse fieldset params. A
+    Query is a mapping of the built params, so it can be passed anywhere a
+    params dict is accepted:
+
+        query = Query().filter("status", "done").fields("log--harvest", "name")
+        farm_client.log.iterate("harvest", params=query)
+
+    Equivalent queries build the same params regardless of the order in which
+    filters, includes and fields were added, so the params can be used as a
+    cache key. The sort order is significant and is kept as provided.
+    """
+
+    def __init__(self):
+        self._filters = []
+        self._sort = []
+        self._include = set()
+        self._fields = {}
+        self._page = {}
+        self._params = None
+
+    def filter(self, path, value=None, operation="="):
+        """Add a filter condition. The same path can be filtered multiple times."""
+        return self.where(Condition(path, value, operation))
+
+    def where(self, *filters):
+        """Add filter conditions or groups built with farmOS.filter.
+
+        All filters added to the query must match.
+        """
+        self._filters.extend(filters)
+        return self._changed()
+
+    def sort(self, *fields):
+        """Sort by one or more fields. Prefix a field with "-" to sort descending."""
+        self._sort.extend(fields)
+        return self._changed()
+
+    def include(self, *paths):
+        """Include related resources in the response."""
+        self._include.update(paths)
+        return self._changed()
+
+    def fields(self, resource_type, *fields):
+        """Only return the given fields of a resource type, eg: "log--harvest"."""
+        self._fields.setdefault(resource_type, set()).update(fields)
+        return self._changed()
+
+    def page(self, limit=None, offset=None):
+        """Set the page limit and offset."""
+        if limit is not None:
+            self._page["page[limit]"] = limit
+        if offset is not None:
+            self._page["page[offset]"] = offset
+        return self._changed()
+
+    def build(self):
+        """Build a dict of query params."""
+        params = {}
+        filters = sorted(self._filters, key=repr)
+        if len(filters) == 1:
+            params.update(filters[0].params())
+        elif filters:
+            params.update(And(*filters).params())
+        if self._sort:
+            params["sort"] = ",".join(self._sort)
+        if self._include:
+            params["include"] = ",".join(sorted(self._include))
+        for resource_type, fields in self._fields.items():
+            params[f"fields[{resource_type}]"] = ",".join(sorted(fields))
+        params.update(self._page)
+        return dict(sorted(params.items()))
+
+    def _changed(self):
+        self._params = None
+        return self
+
+    def _get_params(self):
+        if self._params is None:
+            self._params = self.build()
+        return self._params
+
+    def __getitem__(self, key):
+        return self._get_params()[key]
+
+    def __iter__(self):
+        return iter(self._get_params())
+
+    def __len__(self):
+        return len(self._get_params())
+
+    def __repr__(self):
+        return f"Query({self._get_params()!r})"
@@ -0,0 +1,184 @@
+import asyncio
+import threading
+import time
+
+from farmOS.concurrency import AsyncClock, Clock
+
+# Client side rate limiting shared by every helper of a client. The async
+# classes are prefixed with "Async" so that unasync.py maps them onto their
+# sync counterparts when generating farmOS/_sync.
+
+
+class TokenBucket:
+    """Allow rate requests per second on average, with bursts of up to burst requests.
+
+    Tokens are reserved in advance, so concurrent callers are given increasing
+    delays instead of all waking up when the next token is available.
+    """
+
+    def __init__(self, rate, burst=None):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0.")
+        self.rate = rate
+        self.burst = max(1, burst if burst is not None else rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Reserve a token and return the seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+def _get_endpoint_limiter(limiter, path):
+    """Return the endpoint override with the longest prefix of path, or the limiter."""
+    path = str(path).lstrip("/")
+    matches = [
+        prefix for prefix in limiter.endpoints if path.startswith(prefix.lstrip("/"))
+    ]
+    if not matches:
+        return limiter
+    return limiter.endpoints[max(matches, key=len)]
+
+
+class AsyncRateLimiter:
+    """Limit the request rate and the number of requests in flight of an async client.
+
+    rate and burst configure a token bucket and max_in_flight the number of
+    concurrent requests. Either can be None for no limit. endpoints maps path
+    prefixes, eg: "api/log/observation", to a separate AsyncRateLimiter used for
+    requests to those paths instead of this one. A request must also acquire a
+    slot of the parent limiter if one is given, eg: to share a limit between
+    the clients of a FarmPool.
+    """
+
+    def __init__(
+        self, rate=None, burst=None, max_in_flight=None, endpoints=None, parent=None
+    ):
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1.")
+        self.bucket = None if rate is None else TokenBucket(rate, burst)
+        self.max_in_flight = max_in_flight
+        self.endpoints = dict(endpoints or {})
+        self.parent = parent
+        self._semaphore = None
+
+    def limit(self, path=""):
+        """Return a context manager that waits for a request slot for path."""
+        parent = None if self.parent is None else self.parent.limit(path)
+        return _AsyncLimit(_get_endpoint_limiter(self, path), parent)
+
+    async def _acquire(self):
+        if self.max_in_flight is not None:
+            # Create the semaphore on first use, inside the running event loop.
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            await self._semaphore.acquire()
+        try:
+            if self.bucket is not None:
+                delay = self.bucket.reserve()
+                if delay > 0:
+                    await AsyncClock.sleep(delay)
+        except BaseException:
+            # Give up the slot if waiting for a token was cancelled.
+            self._release()
+            raise
+
+    def _release(self):
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+
+class _AsyncLimit:
+    def __init__(self, limiter, parent=None):
+        self.limiter = limiter
+        self.parent = parent
+
+    async def __aenter__(self):
+        await self.limiter._acquire()
+        if self.parent is not None:
+            try:
+                await self.parent.__aenter__()
+            except BaseException:
+                self.limiter._release()
+                raise
+
+    async def __aexit__(self, *args):
+        if self.parent is not None:
+            await self.parent.__aexit__(*args)
+        self.limiter._release()
+
+
+class RateLimiter:
+    """Limit the request rate and the number of requests in flight of a client.
+
+    rate and burst configure a token bucket and max_in_flight the number of
+    concurrent requests. Either can be None for no limit. endpoints maps path
+    prefixes, eg: "api/log/observation", to a separate RateLimiter used for
+    requests to those paths instead of this one. A request must also acquire a
+    slot of the parent limiter if one is given, eg: to share a limit between
+    the clients of a FarmPool.
+    """
+
+    def __init__(
+        self, rate=None, burst=None, max_in_flight=None, endpoints=None, parent=None
+    ):
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1.")
+        self.bucket = None if rate is None else TokenBucket(rate, burst)
+        self.max_in_flight = max_in_flight
+        self.endpoints = dict(endpoints or {})
+        self.parent = parent
+        self._semaphore = (
+            None if max_in_flight is None else threading.BoundedSemaphore(max_in_flight)
+        )
+
+    def limit(self, path=""):
+        """Return a context manager that waits for a request slot for path."""
+        parent = None if self.parent is None else self.parent.limit(path)
+        return _Limit(_get_endpoint_limiter(self, path), parent)
+
+    def _acquire(self):
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+        try:
+            if self.bucket is not None:
+                delay = self.bucket.reserve()
+                if delay > 0:
+                    Clock.sleep(delay)
+        except BaseException:
+            self._release()
+            raise
+
+    def _release(self):
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+
+class _Limit:
+    def __init__(self, limiter, parent=None):
+        self.limiter = limiter
+        self.parent = parent
+
+    def __enter__(self):
+        self.limiter._acquire()
+        if self.parent is not None:
+            try:
+                self.parent.__enter__()
+            except BaseException:
+                self.limiter._release()
+                raise
+
+    def __exit__(self, *args):
+        if self.parent is not None:
+            self.parent.__exit__(*args)
+        self.limiter._release()
@@ -0,0 +1,117 @@
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Retry policy for idempotent requests. The client retries a request when the
+# policy returns a delay for a failed attempt, and returns the response (or
+# raises the error) when it returns None.
+
+
+class RetryBudget:
+    """Limit retries to a fraction of requests.
+
+    Each request allows ratio additional retries, on top of min_retries. A long
+    running job can recover from many transient errors, while a server that is
+    failing every request is not flooded with retries.
+    """
+
+    def __init__(self, ratio=0.2, min_retries=10):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def try_retry(self):
+        """Use one retry from the budget. Returns False if the budget is spent."""
+        with self._lock:
+            if self.retries >= self.min_retries + self.ratio * self.requests:
+                return False
+            self.retries += 1
+            return True
+
+
+class RetryPolicy:
+    """Retry idempotent requests that fail with a transient error.
+
+    Requests with one of the retry methods are retried after a transport error
+    or a response with one of the retry statuses, up to max_retries times. The
+    delay grows exponentially from backoff up to max_backoff with full jitter.
+    A Retry-After header is used as the delay instead, unless it is longer than
+    max_backoff in which case the request is not retried. If a budget is
+    provided, retries also stop once the budget is spent.
+    """
+
+    def __init__(
+        self,
+        max_retries=5,
+        backoff=0.5,
+        max_backoff=30,
+        jitter=True,
+        statuses=(429, 502, 503, 504),
+        methods=("GET", "HEAD", "OPTIONS", "DELETE"),
+        budget=None,
+    ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(method.upper() for method in methods)
+        self.budget = budget
+
+    def is_retryable_method(self, method):
+        return method.upper() in self.methods
+
+    def is_retryable_status(self, status):
+        return status in self.statuses
+
+    def get_delay(self, attempt, response=None):
+        """Return the seconds to wait before retrying a failed attempt, or None.
+
+        The attempt is zero for the first request. A response is provided if
+        one was returned, otherwise the attempt failed with a transport error.
+        """
+        if attempt == 0 and self.budget is not None:
+            self.budget.record_request()
+
+        if response is not None and not self.is_retryable_status(response.status_code):
+            return None
+        if attempt >= self.max_retries:
+            return None
+
+        delay = None
+        if response is not None:
+            delay = self._get_retry_after(response)
+            if delay is not None and delay > self.max_backoff:
+                return None
+        if delay is None:
+            delay = min(self.max_backoff, self.backoff * 2**attempt)
+            if self.jitter:
+                # Jitter only spreads retries out, it does not need a secure random.
+                delay = random.uniform(0, delay)  # nosec B311
+
+        if self.budget is not None and not self.budget.try_retry():
+            return None
+        return delay
+
+    @staticmethod
+    def _get_retry_after(response):
+        """Return the Retry-After header in seconds, or None."""
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,189 @@
+from farmOS.subrequests_model import SubrequestsBlueprint
+
+# Dependency graph of the subrequests in a blueprint, built from the requestId
+# and waitFor of each subrequest.
+
+
+class SubrequestsGraph:
+    """The waitFor dependencies between the subrequests of a blueprint.
+
+    Subrequests that wait for each other are processed one level after another
+    by the server, so the number of levels is the sequential depth of the
+    blueprint. validate() checks the graph locally so that invalid references
+    and cycles fail before the blueprint is sent.
+    """
+
+    def __init__(self, blueprint):
+        if not isinstance(blueprint, SubrequestsBlueprint):
+            blueprint = SubrequestsBlueprint(blueprint)
+        self.blueprint = blueprint
+        self.subrequests = list(blueprint)
+        # Map of requestId to the index of its subrequest.
+        self.ids = {
+            sub.requestId: index
+            for index, sub in enumerate(self.subrequests)
+            if sub.requestId is not None
+        }
+
+    def validate(self):
+        """Raise a ValueError if a requestId is duplicated, a waitFor reference is
+        unknown or the dependencies contain a cycle."""
+        seen = set()
+        for sub in self.subrequests:
+            if sub.requestId is None:
+                continue
+            if sub.requestId in seen:
+                raise ValueError(f"Duplicate requestId: {sub.requestId}")
+            seen.add(sub.requestId)
+
+        has_dependencies = False
+        for sub in self.subrequests:
+            for id in sub.waitFor or []:
+                has_dependencies = True
+                if id not in self.ids:
+                    raise ValueError(
+                        f"Subrequest {sub.requestId} waits for unknown requestId: {id}"
+                    )
+
+        # A blueprint without dependencies can not contain a cycle.
+        if has_dependencies:
+            self.levels()
+
+    def get_dependencies(self, index):
+        """Return the indexes of the subrequests a subrequest waits for."""
+        wait_for = self.subrequests[index].waitFor or []
+        return [self.ids[id] for id in wait_for if id in self.ids]
+
+    def components(self):
+        """Return lists of the subrequest indexes connected by waitFor.
+
+        Components and the indexes within them are in blueprint order.
+        """
+        parents = list(range(len(self.subrequests)))
+
+        def find(index):
+            while parents[index] != index:
+                parents[index] = parents[parents[index]]
+                index = parents[index]
+            return index
+
+        for index in range(len(self.subrequests)):
+            for dependency in self.get_dependencies(index):
+                root, dependency_root = find(index), find(dependency)
+                if root != dependency_root:
+                    parents[max(root, dependency_root)] = min(root, dependency_root)
+
+        components = {}
+        for index in range(len(self.subrequests)):
+            components.setdefault(find(index), []).append(index)
+        return list(components.values())
+
+    def levels(self):
+        """Return lists of subrequest indexes that can be processed at each level.
+
+        A subrequest is on the level after the last of its dependencies. Raises
+        a ValueError if the dependencies contain a cycle.
+        """
+        depths = self._get_depths()
+        levels = [[] for _ in range(max(depths, default=0))]
+        for index, depth in enumerate(depths):
+            levels[depth - 1].append(index)
+        return levels
+
+    def critical_path(self):
+        """Return the requestIds of the longest chain of dependent subrequests."""
+        depths = self._get_depths()
+        if not depths:
+            return []
+
+        # Walk back from the deepest subrequest through its deepest dependency.
+        index = depths.index(max(depths))
+        path = [index]
+        while depths[index] > 1:
+            index = max(self.get_dependencies(index), key=depths.__getitem__)
+            path.append(index)
+        return [self.subrequests[index].requestId for index in reversed(path)]
+
+    def ordered(self):
+        """Return the blueprint with subrequests sorted by level."""
+        return SubrequestsBlueprint(
+            [self.subrequests[index] for level in self.levels() for index in level]
+        )
+
+    def stats(self):
+        """Return a dict of statistics to tune the structure of a blueprint."""
+        levels = self.levels()
+        components = self.components()
+        return {
+            "subrequests": len(self.subrequests),
+            "components": len(components),
+            "largest_component": max(map(len, components), default=0),
+            "depth": len(levels),
+            "max_width": max(map(len, levels), default=0),
+            "critical_path": self.critical_path(),
+        }
+
+    def _get_depths(self):
+        """Return the level of each subrequest, starting from 1."""
+        dependents = [[] for _ in self.subrequests]
+        waiting = []
+        for index in range(len(self.subrequests)):
+            dependencies = set(self.get_dependencies(index))
+            waiting.append(len(dependencies))
+            for dependency in dependencies:
+                dependents[dependency].append(index)
+
+        depths = [1] * len(self.subrequests)
+        ready = [index for index, count in enumerate(waiting) if count == 0]
+        processed = 0
+        while ready:
+            index = ready.pop()
+            processed += 1
+            for dependent in dependents[index]:
+                depths[dependent] = max(depths[dependent], depths[index] + 1)
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+
+        if processed < len(self.subrequests):
+            blocked = [
+                self.subrequests[index].requestId
+                for index, count in enumerate(waiting)
+                if count
+            ]
+            raise ValueError(
+                "The waitFor dependencies contain a cycle. "
+                f"Subrequests in or waiting on the cycle: {blocked}"
+            )
+        return depths
+
+    def chunks(self, size):
+        """Split the blueprint into blueprints of up to size subrequests.
+
+        Subrequests connected by waitFor are kept in the same chunk, so a chunk
+        is larger than size if a single component is. The subrequests of each
+        chunk are sorted by level.
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1.")
+
+        chunks = []
+        current = []
+        for component in self.components():
+            if current and len(current) + len(component) > size:
+                chunks.append(current)
+                current = []
+            current.extend(component)
+        if current:
+            chunks.append(current)
+
+        depths = self._get_depths()
+        return [
+            SubrequestsBlueprint(
+                [
+                    self.subrequests[index]
+                    for index in sorted(chunk, key=lambda index: (depths[index], index))
+                ]
+            )
+            for chunk in chunks
+        ]
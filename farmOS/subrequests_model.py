@@ -1,9 +1,12 @@
 import json
+import re
 from enum import Enum
 from typing import Any, Dict, Iterator, List, Optional, Union
 
 from pydantic import BaseModel, Field, RootModel, field_validator, model_validator
 
+from farmOS.codec import get_codec
+
 # Subrequests model derived from provided JSON Schema
 # https://git.drupalcode.org/project/subrequests/-/blob/3.x/schema.json
 
@@ -57,7 +60,7 @@ class Subrequest(BaseModel):
         # endpoint = values.get("endpoint", None)
         if self.uri is None and self.endpoint is None:
             raise ValueError("Either uri or endpoint is required.")
-        return self.uri
+        return self
 
     @field_validator("body")
     def serialize_body(cls, body):
@@ -66,6 +69,41 @@ class Subrequest(BaseModel):
         return body
 
 
+class TrustedSubrequest:
+    """A subrequest built without validation, for large blueprints of trusted input.
+
+    Accepts the same fields as Subrequest, but the action and body are not
+    converted and uri or endpoint is not checked. The body can be a dict, in
+    which case it is encoded when the blueprint is serialized.
+    """
+
+    __slots__ = ("action", "endpoint", "uri", "requestId", "body", "headers", "waitFor")
+
+    def __init__(
+        self,
+        action,
+        endpoint=None,
+        uri=None,
+        requestId=None,
+        body=None,
+        headers=None,
+        waitFor=None,
+    ):
+        self.action = action
+        self.endpoint = endpoint
+        self.uri = uri
+        self.requestId = requestId
+        self.body = body
+        self.headers = headers
+        self.waitFor = waitFor
+
+    def __repr__(self):
+        return (
+            f"TrustedSubrequest(action={self.action!r}, uri={self.uri!r}, "
+            f"endpoint={self.endpoint!r}, requestId={self.requestId!r})"
+        )
+
+
 class SubrequestsBlueprint(RootModel):
     root: List
 
@@ -79,3 +117,167 @@ class SubrequestsBlueprint(RootModel):
 class Format(str, Enum):
     html = "html"
     json = "json"
+
+
+# Default headers of each subrequest, shared by all items that do not set any.
+_JSONAPI_CONTENT_TYPE = "application/vnd.api+json"
+_HEADERS = {"Accept": _JSONAPI_CONTENT_TYPE}
+_BODY_HEADERS = {"Accept": _JSONAPI_CONTENT_TYPE, "Content-Type": _JSONAPI_CONTENT_TYPE}
+
+
+def serialize_blueprint(blueprint, codec=None) -> bytes:
+    """Encode a blueprint of Subrequest or TrustedSubrequest items in one pass.
+
+    The uri is built from the endpoint if it is not provided, and the Accept
+    and Content-Type headers default to the JSON:API media type. The items of
+    the blueprint are not modified.
+    """
+    dumps = (codec or get_codec()).dumps
+    return dumps([_get_subrequest_item(sub, dumps) for sub in blueprint])
+
+
+def iter_blueprint(blueprint, codec=None, chunk_size=65536) -> Iterator[bytes]:
+    """Encode a blueprint like serialize_blueprint, one subrequest at a time.
+
+    Yields chunks of about chunk_size bytes so that a large blueprint can be
+    sent as a streamed request body without encoding all of it in memory.
+    """
+    dumps = (codec or get_codec()).dumps
+    buffer = bytearray(b"[")
+    for index, sub in enumerate(blueprint):
+        if index:
+            buffer += b","
+        buffer += dumps(_get_subrequest_item(sub, dumps))
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b"]"
+    yield bytes(buffer)
+
+
+def _get_subrequest_item(sub, dumps):
+    """Helper function that returns the serialized fields of a subrequest."""
+    action = sub.action
+    item = {
+        "action": action.value if isinstance(action, Action) else action,
+        "uri": sub.uri if sub.uri is not None else sub.endpoint,
+    }
+    if sub.requestId is not None:
+        item["requestId"] = sub.requestId
+
+    body = sub.body
+    headers = _HEADERS
+    if body is not None:
+        item["body"] = body if isinstance(body, str) else dumps(body).decode()
+        headers = _BODY_HEADERS
+    if sub.headers:
+        headers = {**headers, **sub.headers}
+    item["headers"] = headers
+
+    if sub.waitFor is not None:
+        item["waitFor"] = sub.waitFor
+    return item
+
+
+# Subrequests appends a suffix such as "#body{0}" to the requestId of each
+# response of a subrequest that fans out over the results of another.
+_FAN_OUT_INDEX = re.compile(r"\{(\d+)\}$")
+
+_UNDECODED = object()
+
+
+class Subresponse(dict):
+    """A subresponse returned with the json format.
+
+    The raw "headers" and "body" returned by the server are kept as dict items.
+    The body is only decoded the first time json() is called.
+    """
+
+    def __init__(self, data=None, codec=None):
+        super().__init__(data or {})
+        self.codec = codec
+        self._json = _UNDECODED
+
+    @property
+    def headers(self) -> Dict[str, Any]:
+        return self.get("headers") or {}
+
+    @property
+    def status(self) -> Optional[int]:
+        """The HTTP status code of the subresponse, or None if it is missing."""
+        status = self.headers.get("status")
+        if not status:
+            return None
+        if isinstance(status, list):
+            status = status[0]
+        return int(status)
+
+    @property
+    def ok(self) -> bool:
+        return self.status is not None and self.status < 400
+
+    def json(self) -> Any:
+        """Return the decoded body. Raises a ValueError if it is not valid JSON."""
+        if self._json is _UNDECODED:
+            codec = self.codec or get_codec()
+            body = self.get("body")
+            self._json = None if not body else codec.loads(body)
+        return self._json
+
+
+class SubrequestsResponse(dict):
+    """The response to a blueprint sent with the json format.
+
+    A dict of Subresponse keyed by the response keys returned by the server.
+    get_responses() also finds the responses of a requestId that fans out over
+    the results of another subrequest, keyed as "requestId#body{0}" etc.
+    errors maps the requestIds of a chunked blueprint whose chunk could not be
+    sent to the exception that was raised.
+    """
+
+    def __init__(self, data=None, codec=None):
+        super().__init__(
+            (key, Subresponse(value, codec)) for key, value in (data or {}).items()
+        )
+        self.codec = codec
+        self.errors = {}
+        self._index = None
+
+    def __setitem__(self, key, value):
+        if not isinstance(value, Subresponse):
+            value = Subresponse(value, self.codec)
+        super().__setitem__(key, value)
+        self._index = None
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._index = None
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def get_responses(self, request_id: str) -> List[Subresponse]:
+        """Return the subresponses of a requestId in fan-out order."""
+        if self._index is None:
+            self._index = self._build_index()
+        return [self[key] for key in self._index.get(request_id, [])]
+
+    def get_response(self, request_id: str, default=None) -> Optional[Subresponse]:
+        """Return the first subresponse of a requestId, or default."""
+        responses = self.get_responses(request_id)
+        return responses[0] if responses else default
+
+    def failed(self) -> Dict[str, Subresponse]:
+        """Return the subresponses that do not have a successful status."""
+        return {key: response for key, response in self.items() if not response.ok}
+
+    def _build_index(self):
+        """Map each requestId to its response keys, sorted by fan-out index."""
+        index = {}
+        for key in self:
+            id, _, suffix = key.partition("#")
+            match = _FAN_OUT_INDEX.search(suffix)
+            position = int(match.group(1)) if match else -1
+            index.setdefault(id, []).append((position, key))
+        return {id: [key for _, key in sorted(keys)] for id, keys in index.items()}
@@ -15,6 +15,11 @@ SUBS = [
     ("async with", "with"),
     ("async for", "for"),
     ("await ", ""),
+    ("aclose", "close"),
+    ("aiter_bytes", "iter_bytes"),
+    ("aread", "read"),
+    ("__aenter__", "__enter__"),
+    ("__aexit__", "__exit__"),
     ("@pytest.mark.anyio", ""),
 ]
 COMPILED_SUBS = [
@@ -8,6 +8,8 @@ install_requires = ["httpx~=0.28", "httpx_auth~=0.23", "pydantic~=2.0"]
 
 extras_require = {
     "test": ["pytest~=7.0", "black~=23.0", "setuptools~=68.0"],
+    "orjson": ["orjson~=3.0"],
+    "msgspec": ["msgspec"],
 }
 
 with open("README.md") as fh:
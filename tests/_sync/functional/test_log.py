@@ -1,9 +1,13 @@
 # AUTO-GENERATED FILE: do not edit manually. Generated by unasync.py.
+import math
 from datetime import datetime, timezone
 
 import pytest
 
 from farmOS import FarmClient
+from farmOS.checkpoint import Checkpoint
+from farmOS.metrics import InMemoryCollector, Metrics, PushExporter
+from farmOS.paging import AdaptivePageSize
 from tests.conftest import farmOS_testing_server
 
 curr_time = datetime.now(timezone.utc)
@@ -77,3 +81,289 @@ def test_log_get(farm_auth, test_logs):
         # Get all logs.
         all_logs = [log for log in farm.log.iterate(test_log["type"])]
         assert len(all_logs) > len(response["data"])
+
+
+
+@farmOS_testing_server
+def test_log_iterate_prefetch(farm_auth, test_logs):
+    hostname, auth = farm_auth
+    with FarmClient(hostname, auth=auth) as farm:
+        params = {"page[limit]": 10}
+        all_logs = [
+            log["id"] for log in farm.log.iterate(test_log["type"], params=params)
+        ]
+        prefetched_logs = [
+            log["id"]
+            for log in farm.log.iterate(
+                test_log["type"], params=params, prefetch=4
+            )
+        ]
+
+        # Assert that prefetching yields the same logs in the same order.
+        assert prefetched_logs == all_logs
+
+
+
+@farmOS_testing_server
+def test_log_iterate_page_size(farm_auth, test_logs):
+    hostname, auth = farm_auth
+    with FarmClient(hostname, auth=auth) as farm:
+        params = {"sort": "drupal_internal__id"}
+        all_logs = [
+            log["id"] for log in farm.log.iterate(test_log["type"], params=params)
+        ]
+        page_size = AdaptivePageSize(target_seconds=10, initial_limit=5, max_limit=500)
+        tuned_logs = [
+            log["id"]
+            for log in farm.log.iterate(
+                test_log["type"], params=params, page_size=page_size
+            )
+        ]
+
+        # Assert that tuning the page size yields the same logs in the same order.
+        assert tuned_logs == all_logs
+        assert page_size.history[0].limit == 5
+        assert page_size.limit <= 500
+
+
+
+@farmOS_testing_server
+def test_log_iterate_checkpoint(farm_auth, test_logs, tmp_path):
+    hostname, auth = farm_auth
+    with FarmClient(hostname, auth=auth) as farm:
+        params = {"sort": "drupal_internal__id", "page[limit]": 3}
+        all_logs = [
+            log["id"] for log in farm.log.iterate(test_log["type"], params=params)
+        ]
+
+        # Stop part way through the second page.
+        path = tmp_path / "checkpoint.json"
+        checkpoint = Checkpoint(path)
+        logs = []
+        for log in farm.log.iterate(
+            test_log["type"], params=params, checkpoint=checkpoint
+        ):
+            logs.append(log["id"])
+            if len(logs) == 4:
+                break
+        checkpoint.save()
+
+        # Assert that a new iteration resumes at the last log, which is returned
+        # again since it may not have been processed.
+        checkpoint = Checkpoint(path)
+        logs.pop()
+        logs.extend(
+            [
+                log["id"]
+                for log in farm.log.iterate(
+                    test_log["type"], params=params, checkpoint=checkpoint
+                )
+            ]
+        )
+        assert logs == all_logs
+        assert checkpoint.done
+
+
+
+@farmOS_testing_server
+def test_log_export(farm_auth, test_logs):
+    hostname, auth = farm_auth
+    with FarmClient(hostname, auth=auth) as farm:
+        params = {"sort": "drupal_internal__id"}
+        all_logs = [
+            log["id"] for log in farm.log.iterate(test_log["type"], params=params)
+        ]
+        exported_logs = [
+            log["id"]
+            for log in farm.log.export(test_log["type"], shards=5, concurrency=3)
+        ]
+
+        # Assert that the shards are merged back in drupal_internal__id order.
+        assert exported_logs == all_logs
+
+
+
+@farmOS_testing_server
+def test_log_send_many(farm_auth):
+    hostname, auth = farm_auth
+    with FarmClient(hostname, auth=auth) as farm:
+        payloads = [
+            {"attributes": {"name": "Bulk log #" + str(x), "timestamp": timestamp}}
+            for x in range(1, 13)
+        ]
+        # Include an invalid payload.
+        payloads.append({"attributes": {"status": "invalid status"}})
+
+        results = farm.log.send_many(
+            test_log["type"], payloads, batch_size=5, concurrency=2
+        )
+        assert len(results) == len(payloads)
+
+        # Assert that each result matches the payload at the same index.
+        for payload, result in zip(payloads[:-1], results[:-1]):
+            assert result["data"]["attributes"]["name"] == payload["attributes"]["name"]
+
+        # Assert that the error is returned at the index of the invalid payload.
+        assert "errors" in results[-1]
+
+        # Update the logs.
+        changes = [
+            {"id": result["data"]["id"], "attributes": {"status": "done"}}
+            for result in results[:-1]
+        ]
+        results = farm.log.send_many(test_log["type"], changes)
+        for result in results:
+            assert result["data"]["attributes"]["status"] == "done"
+
+
+
+@farmOS_testing_server
+def test_log_delete_many(farm_auth):
+    hostname, auth = farm_auth
+    with FarmClient(hostname, auth=auth) as farm:
+        payloads = [
+            {"attributes": {"name": "Log to delete #" + str(x)}} for x in range(1, 13)
+        ]
+        results = farm.log.send_many(test_log["type"], payloads)
+        log_ids = [result["data"]["id"] for result in results]
+
+        progress = []
+        statuses = farm.log.delete_many(
+            test_log["type"],
+            log_ids,
+            batch_size=5,
+            concurrency=2,
+            progress=lambda completed, total: progress.append((completed, total)),
+        )
+
+        # Assert that each log was deleted.
+        assert statuses == {log_id: 204 for log_id in log_ids}
+        assert progress == [(5, 12), (10, 12), (12, 12)]
+
+
+
+@farmOS_testing_server
+def test_log_changes_since(farm_auth, test_logs):
+    hostname, auth = farm_auth
+    with FarmClient(hostname, auth=auth) as farm:
+        # Stop part way through the changes.
+        cursor = {}
+        changed_logs = []
+        for log in farm.log.changes_since(test_log["type"], cursor=cursor):
+            changed_logs.append(log["id"])
+            if len(changed_logs) == 10:
+                break
+
+        # Resume from the cursor.
+        for log in farm.log.changes_since(test_log["type"], cursor=cursor):
+            changed_logs.append(log["id"])
+
+        # Assert that no logs were skipped or repeated.
+        all_logs = [log["id"] for log in farm.log.iterate(test_log["type"])]
+        assert len(changed_logs) == len(set(changed_logs))
+        assert set(changed_logs) == set(all_logs)
+
+        # Update a log and assert it is the only change after the cursor.
+        log_changes = {"id": test_logs[0], "attributes": {"name": "Changed log"}}
+        farm.log.send(test_log["type"], log_changes)
+        changed_logs = [
+            log["id"]
+            for log in farm.log.changes_since(test_log["type"], cursor=cursor)
+        ]
+        assert changed_logs == [test_logs[0]]
+
+
+
+@farmOS_testing_server
+def test_log_iterate_stream(farm_auth, test_logs):
+    hostname, auth = farm_auth
+    with FarmClient(hostname, auth=auth) as farm:
+        all_logs = [log for log in farm.log.iterate(test_log["type"])]
+        streamed_logs = [
+            log for log in farm.log.iterate(test_log["type"], stream=True)
+        ]
+
+        # Assert that streaming yields the same logs in the same order.
+        assert streamed_logs == all_logs
+
+
+
+@farmOS_testing_server
+def test_log_codec(farm_auth, test_logs):
+    hostname, auth = farm_auth
+    with FarmClient(hostname, auth=auth, codec="json") as farm:
+        response = farm.log.get(test_log["type"])
+    with FarmClient(hostname, auth=auth) as farm:
+        fast_response = farm.log.get(test_log["type"])
+
+        # Assert that the default codec decodes the same response.
+        assert fast_response == response
+
+
+
+@farmOS_testing_server
+def test_log_hooks(farm_auth, test_logs):
+    hostname, auth = farm_auth
+    metrics = Metrics()
+    events = []
+    with FarmClient(
+        hostname, auth=auth, hooks=[metrics, events.append]
+    ) as farm:
+        params = {"page[limit]": 5}
+        logs = [log for log in farm.log.iterate(test_log["type"], params=params)]
+        farm.log.get(test_log["type"])
+
+    # Assert that an event was emitted for each page request.
+    endpoint = f"api/log/{test_log['type']}"
+    pages = [event for event in events if event.operation == "iterate"]
+    assert len(pages) >= math.ceil(len(logs) / 5)
+    assert all(event.endpoint == endpoint and event.status == 200 for event in pages)
+    assert all(event.size > 0 and event.seconds > 0 for event in pages)
+
+    # Assert that the events were aggregated and can be exported.
+    collector = InMemoryCollector()
+    PushExporter(metrics, collector).export()
+    seconds = collector.get(
+        "farmos_client_request_seconds", operation="iterate", endpoint=endpoint
+    )
+    assert seconds.count == len(pages)
+    assert collector.get("farmos_client_requests_total", operation="get") == 1
+
+
+
+@farmOS_testing_server
+def test_log_iterate_resolve_includes(farm_auth):
+    hostname, auth = farm_auth
+    with FarmClient(hostname, auth=auth) as farm:
+        asset = farm.asset.send("equipment", {"attributes": {"name": "Tractor"}})
+        asset_id = asset["data"]["id"]
+        relationships = {
+            "asset": {"data": [{"type": "asset--equipment", "id": asset_id}]}
+        }
+        payloads = [
+            {"attributes": {"name": "Log #" + str(x)}, "relationships": relationships}
+            for x in range(1, 4)
+        ]
+        results = farm.log.send_many(test_log["type"], payloads)
+        log_ids = [result["data"]["id"] for result in results]
+
+        params = {
+            **farm.filter("id", log_ids, "IN"),
+            "include": "asset",
+            "page[limit]": 2,
+        }
+        logs = [
+            log
+            for log in farm.log.iterate(
+                test_log["type"], params=params, resolve_includes=True
+            )
+        ]
+        assert len(logs) == len(log_ids)
+
+        # Assert that every log shares the same resolved asset.
+        resolved = [log["relationships"]["asset"]["resolved"][0] for log in logs]
+        assert resolved[0]["attributes"]["name"] == "Tractor"
+        assert all(asset is resolved[0] for asset in resolved)
+
+        farm.log.delete_many(test_log["type"], log_ids)
+        farm.asset.delete("equipment", asset_id)
@@ -137,6 +137,12 @@ def test_subrequests(farm_auth):
                 entity_type, bundle, resource_id
             )
 
+            # Test the parsed response model.
+            request_id = response_key.split("#")[0]
+            subresponse = post_response.get_response(request_id)
+            assert subresponse.status == 201
+            assert subresponse.json()["data"]["id"] == resource_id
+
             assert created_resource is not None
             assert created_resource["data"]["id"] == resource_id
 
@@ -152,3 +158,98 @@ def test_subrequests(farm_auth):
                 assert len(relationship_field["data"]) == len(relationships)
                 for resource in relationships:
                     assert relationship_field["data"][0]["type"] == resource["type"]
+
+
+
+@farmOS_testing_server
+def test_subrequests_chunked(farm_auth):
+    blueprint = []
+    for x in range(1, 6):
+        blueprint.append(
+            Subrequest(
+                action=Action.create,
+                requestId=f"create-asset-{x}",
+                endpoint="api/asset/equipment",
+                body={
+                    "data": {
+                        "type": "asset--equipment",
+                        "attributes": {"name": f"Chunked asset #{x}"},
+                    }
+                },
+            )
+        )
+        blueprint.append(
+            Subrequest(
+                action=Action.create,
+                requestId=f"create-log-{x}",
+                waitFor=[f"create-asset-{x}"],
+                endpoint="api/log/activity",
+                body={
+                    "data": {
+                        "type": "log--activity",
+                        "attributes": {"name": f"Chunked log #{x}"},
+                        "relationships": {
+                            "asset": {
+                                "data": [
+                                    {
+                                        "type": "asset--equipment",
+                                        "id": f"{{{{create-asset-{x}.body@$.data.id}}}}",
+                                    }
+                                ]
+                            }
+                        },
+                    }
+                },
+            )
+        )
+
+    hostname, auth = farm_auth
+    with FarmClient(hostname, auth=auth) as farm:
+        post_response = farm.subrequests.send(
+            blueprint, chunk_size=4, concurrency=2
+        )
+
+        # Assert that the responses of every chunk were merged.
+        assert len(post_response) == 10
+        for x in range(1, 6):
+            asset = post_response.get_response(f"create-asset-{x}").json()
+            log = post_response.get_response(f"create-log-{x}").json()
+            asset_id = asset["data"]["id"]
+
+            # Assert that the log references the asset of its chunk.
+            assert log["data"]["relationships"]["asset"]["data"][0]["id"] == asset_id
+
+            farm.log.delete("activity", log["data"]["id"])
+            farm.asset.delete("equipment", asset_id)
+
+
+
+@farmOS_testing_server
+def test_subrequests_stream(farm_auth):
+    blueprint = [
+        Subrequest(
+            action=Action.create,
+            requestId=f"create-asset-{x}",
+            endpoint="api/asset/equipment",
+            body={
+                "data": {
+                    "type": "asset--equipment",
+                    "attributes": {"name": f"Streamed asset #{x}"},
+                }
+            },
+        )
+        for x in range(1, 4)
+    ]
+
+    hostname, auth = farm_auth
+    with FarmClient(hostname, auth=auth) as farm:
+        responses = {}
+        for key, subresponse in farm.subrequests.stream(blueprint):
+            responses[key] = subresponse
+
+        # Assert that a subresponse was streamed for each subrequest.
+        assert len(responses) == 3
+        for subresponse in responses.values():
+            assert subresponse.status == 201
+            asset_id = subresponse.json()["data"]["id"]
+            farm.asset.delete("equipment", asset_id)
@@ -2,6 +2,7 @@
 import pytest
 
 from farmOS import FarmClient
+from farmOS.cache import MemoryCache
 from tests.conftest import farmOS_testing_server
 
 test_term = {
@@ -64,3 +65,52 @@ def test_term_get(farm_auth, test_terms):
         # Get all plant_type terms.
         all_terms = [term for term in farm.term.iterate(test_term["type"])]
         assert len(all_terms) > len(response["data"])
+
+
+
+@farmOS_testing_server
+def test_term_get_cached(farm_auth, test_terms):
+    hostname, auth = farm_auth
+    cache = MemoryCache(ttl=60)
+    with FarmClient(hostname, auth=auth, cache=cache) as farm:
+        # Get the same page of terms twice.
+        response = farm.term.get(test_term["type"])
+        assert len(cache) == 1
+        cached_response = farm.term.get(test_term["type"])
+        assert cached_response == response
+
+        # Assert that cached documents can be modified without affecting the cache.
+        cached_response["data"].clear()
+        cached_response = farm.term.get(test_term["type"])
+        assert cached_response == response
+
+        # Assert that creating a term invalidates the cached responses.
+        post_response = farm.term.send(test_term["type"], test_term["payload"])
+        assert len(cache) == 0
+        farm.term.delete(test_term["type"], post_response["data"]["id"])
+
+
+
+@farmOS_testing_server
+def test_term_index(farm_auth, test_terms, tmp_path):
+    hostname, auth = farm_auth
+    index_path = tmp_path / "plant_type.json"
+    with FarmClient(hostname, auth=auth) as farm:
+        index = farm.term.index(test_term["type"], path=index_path)
+        index.refresh()
+        assert len(index) >= len(test_terms)
+        for term_id in test_terms:
+            term = index.get(term_id)
+            assert index.get_id(term["attributes"]["name"]) == term_id
+
+        # Rename a term and refresh the index.
+        term_changes = {"id": test_terms[0], "attributes": {"name": "Renamed type"}}
+        farm.term.send(test_term["type"], term_changes)
+        index.refresh()
+        assert index.get_id("Renamed type") == test_terms[0]
+
+        # Assert that a new index starts from the saved index.
+        warm_index = farm.term.index(test_term["type"], path=index_path)
+        assert len(warm_index) == len(index)
+        assert warm_index.cursor == index.cursor
+        assert warm_index.lookup("Renamed type")["id"] == test_terms[0]
@@ -0,0 +1,67 @@
+import pytest
+
+from farmOS import FarmPool
+from farmOS.cache import MemoryCache, SQLiteCache
+from farmOS.mock_server import MockFarmServer
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryCache(ttl=3600)
+    else:
+        cache = SQLiteCache(str(tmp_path / "cache.sqlite"), ttl=3600)
+        yield cache
+        cache.close()
+
+
+def test_cache_key():
+    # Pagination link paths and resource paths share keys.
+    assert MemoryCache.get_key("/api/log/activity?page%5Boffset%5D=5") == (
+        "api/log/activity?page%5Boffset%5D=5"
+    )
+    assert MemoryCache.get_key("api/log/activity", {"sort": "name"}) == (
+        "api/log/activity?sort=name"
+    )
+    assert MemoryCache.get_key("/api/log/activity", base_url="http://farm.test") == (
+        "http://farm.test/api/log/activity"
+    )
+
+
+def test_iterate_after_send(cache):
+    server = MockFarmServer(max_page_size=5)
+    server.populate("log", "activity", 12)
+    with server.client(cache=cache) as farm:
+        assert len(list(farm.log.iterate("activity"))) == 12
+
+        # Pages are served from the cache.
+        requests = len(server.requests)
+        assert len(list(farm.log.iterate("activity"))) == 12
+        assert len(server.requests) == requests
+
+        # Every cached page of the resource type is invalidated by a write.
+        farm.log.send("activity", {"attributes": {"name": "New log"}})
+        assert len(list(farm.log.iterate("activity"))) == 13
+
+
+def test_shared_cache(cache):
+    servers = [MockFarmServer(hostname=f"http://farm{n}.test") for n in range(2)]
+    servers[0].populate("log", "activity", 1)
+    servers[1].populate("log", "activity", 3)
+    farms = {server.hostname: {"transport": server.transport()} for server in servers}
+
+    # Each farm has its own cached responses.
+    with FarmPool(farms, cache=cache) as pool:
+        for _ in range(2):
+            results, errors = pool.map(
+                lambda farm: len(farm.log.get("activity")["data"])
+            )
+            assert results == {"http://farm0.test": 1, "http://farm1.test": 3}
+
+        # A write only invalidates the responses of its farm.
+        with pool.client("http://farm0.test") as farm:
+            farm.log.send("activity", {"attributes": {"name": "New log"}})
+        requests = len(servers[1].requests)
+        results, errors = pool.map(lambda farm: len(farm.log.get("activity")["data"]))
+        assert results == {"http://farm0.test": 2, "http://farm1.test": 3}
+        assert len(servers[1].requests) == requests
@@ -0,0 +1,49 @@
+import pytest
+
+from farmOS.checkpoint import Checkpoint
+
+
+def test_checkpoint(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    states = []
+    checkpoint = Checkpoint(path, callback=states.append)
+    checkpoint.start("log", "observation", {"page[limit]": 20})
+    assert checkpoint.url is None
+    assert checkpoint.index == 0
+    assert not checkpoint.done
+
+    # Advancing within a page is not saved until the page is consumed.
+    checkpoint.advance(None, 5)
+    assert not path.exists()
+    checkpoint.next_page("https://farm/api/log/observation?page[offset]=20")
+    assert states[-1]["url"] == "https://farm/api/log/observation?page[offset]=20"
+    assert states[-1]["index"] == 0
+
+    # Saving records the position within the current page.
+    checkpoint.advance("https://farm/api/log/observation?page[offset]=20", 7)
+    checkpoint.save()
+
+    resumed = Checkpoint(path)
+    resumed.start("log", "observation", {"page[limit]": 20})
+    assert resumed.url == "https://farm/api/log/observation?page[offset]=20"
+    assert resumed.index == 7
+
+    # The last page completes the iteration.
+    resumed.next_page(None)
+    assert Checkpoint(path).done
+
+    resumed.reset()
+    assert not path.exists()
+    assert resumed.state == {}
+
+
+def test_checkpoint_query():
+    checkpoint = Checkpoint()
+    checkpoint.start("log", "observation", {"page[limit]": 20})
+    checkpoint.start("log", "observation", {"page[limit]": 20})
+
+    # A checkpoint can not be used for a different query.
+    with pytest.raises(ValueError):
+        checkpoint.start("log", "activity", {"page[limit]": 20})
+    with pytest.raises(ValueError):
+        checkpoint.start("log", "observation", {"page[limit]": 10})
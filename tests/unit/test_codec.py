@@ -0,0 +1,34 @@
+import pytest
+
+from farmOS.codec import CODECS, JSONCodec, get_codec
+
+document = {"data": [{"id": "1", "attributes": {"name": "Log ü", "count": 1.5}}]}
+
+
+@pytest.mark.parametrize("name", list(CODECS))
+def test_codec_round_trip(name):
+    try:
+        codec = get_codec(name)
+    except ImportError:
+        pytest.skip(f"{name} is not installed.")
+
+    encoded = codec.dumps(document)
+    assert isinstance(encoded, bytes)
+    assert codec.loads(encoded) == document
+    assert codec.loads(encoded.decode()) == document
+
+    # Invalid documents raise a ValueError.
+    with pytest.raises(ValueError):
+        codec.loads(b'{"data": ')
+
+
+def test_get_codec():
+    # A codec is always available.
+    assert get_codec() is not None
+
+    # Codec instances are returned unchanged.
+    codec = JSONCodec()
+    assert get_codec(codec) is codec
+
+    with pytest.raises(ValueError):
+        get_codec("unknown")
@@ -0,0 +1,73 @@
+import pytest
+
+from farmOS.filter import And, Condition, Group, Or, filter
+
+
+def test_filter():
+    assert filter("status", "done") == {"filter[status]": "done"}
+    assert filter("drupal_internal__id", [1, 10], "BETWEEN") == {
+        "filter[drupal_internal__id_between][condition][path]": "drupal_internal__id",
+        "filter[drupal_internal__id_between][condition][operator]": "BETWEEN",
+        "filter[drupal_internal__id_between][condition][value][]": [1, 10],
+    }
+
+
+def test_condition_params():
+    assert Condition("timestamp", 1700000000, ">").params() == {
+        "filter[c1][condition][path]": "timestamp",
+        "filter[c1][condition][operator]": ">",
+        "filter[c1][condition][value]": 1700000000,
+    }
+    assert Condition("status", ["done", "pending"], "IN").params() == {
+        "filter[c1][condition][path]": "status",
+        "filter[c1][condition][operator]": "IN",
+        "filter[c1][condition][value][]": ["done", "pending"],
+    }
+    assert Condition("notes", operator="IS NULL").params(prefix="n") == {
+        "filter[nc1][condition][path]": "notes",
+        "filter[nc1][condition][operator]": "IS NULL",
+    }
+
+
+def test_group_params():
+    window = Condition("timestamp", [1700000000, 1800000000], "BETWEEN")
+    status = Condition("status", "done") | Condition("status", "pending")
+    assert isinstance(status, Or)
+    assert (window & status).params() == {
+        "filter[g1][group][conjunction]": "AND",
+        "filter[c1][condition][path]": "timestamp",
+        "filter[c1][condition][operator]": "BETWEEN",
+        "filter[c1][condition][value][]": [1700000000, 1800000000],
+        "filter[c1][condition][memberOf]": "g1",
+        "filter[g2][group][conjunction]": "OR",
+        "filter[g2][group][memberOf]": "g1",
+        "filter[c2][condition][path]": "status",
+        "filter[c2][condition][operator]": "=",
+        "filter[c2][condition][value]": "done",
+        "filter[c2][condition][memberOf]": "g2",
+        "filter[c3][condition][path]": "status",
+        "filter[c3][condition][operator]": "=",
+        "filter[c3][condition][value]": "pending",
+        "filter[c3][condition][memberOf]": "g2",
+    }
+
+
+@pytest.mark.parametrize(
+    "path,value,operator",
+    [
+        ("status", "done", "LIKE"),
+        ("status", None, "="),
+        ("notes", "value", "IS NULL"),
+        ("timestamp", [1], "BETWEEN"),
+    ],
+)
+def test_invalid_condition(path, value, operator):
+    with pytest.raises(ValueError):
+        Condition(path, value, operator)
+
+
+def test_invalid_group():
+    with pytest.raises(ValueError):
+        And()
+    with pytest.raises(ValueError):
+        Group("XOR", Condition("status", "done"))
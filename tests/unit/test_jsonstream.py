@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from farmOS.jsonstream import JSONAPIStreamParser, JSONObjectStreamParser
+
+document = {
+    "jsonapi": {"version": "1.0"},
+    "data": [
+        {
+            "type": "log--observation",
+            "id": "1",
+            "attributes": {"name": 'Log with "quotes", [brackets] and {braces}'},
+        },
+        {
+            "type": "log--observation",
+            "id": "2",
+            "attributes": {"name": "Log with \\ backslash", "notes": None},
+        },
+        {"type": "log--observation", "id": "3", "attributes": {"count": -1.5e3}},
+    ],
+    "included": [{"type": "asset--plant", "id": "4"}],
+    "links": {"next": {"href": "https://example.com/api/log/observation?page=2"}},
+}
+
+
+def parse(body, chunk_size):
+    parser = JSONAPIStreamParser()
+    items = []
+    for start in range(0, len(body), chunk_size):
+        end = start + chunk_size
+        items.extend(parser.feed(body[start:end]))
+    return items, parser.close()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 100000])
+def test_parse_chunks(chunk_size):
+    body = json.dumps(document, indent=1, ensure_ascii=False).encode()
+    items, parsed = parse(body, chunk_size)
+
+    # Assert that the data items are returned and the rest of the document kept.
+    assert items == document["data"]
+    assert parsed == {key: value for key, value in document.items() if key != "data"}
+
+
+def test_parse_single_resource():
+    single = {"data": {"type": "log--observation", "id": "1"}, "links": {}}
+    items, parsed = parse(json.dumps(single).encode(), 3)
+    assert items == []
+    assert parsed == single
+
+
+def test_items_returned_incrementally():
+    body = json.dumps(document).encode()
+    second_item = body.index(b'{"type": "log--observation", "id": "2"')
+
+    parser = JSONAPIStreamParser()
+    # The first item is complete once the separator before the second is read.
+    assert parser.feed(body[:second_item]) == document["data"][:1]
+    # Parsed bytes are not kept in the buffer.
+    assert len(parser._buffer) < len(body[:second_item])
+    assert parser.feed(body[second_item:]) == document["data"][1:]
+
+
+def test_incomplete_document():
+    parser = JSONAPIStreamParser()
+    parser.feed(b'{"data": [{"id": "1"}')
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_object_members_returned_incrementally():
+    responses = {
+        "create-1": {"headers": {"status": ["201"]}, "body": '{"data": {"id": "1"}}'},
+        "create-2": {"headers": {"status": ["201"]}, "body": '{"data": {"id": "2"}}'},
+    }
+    body = json.dumps(responses).encode()
+    second_member = body.index(b'"create-2"')
+
+    parser = JSONObjectStreamParser()
+    assert parser.feed(body[:second_member]) == [("create-1", responses["create-1"])]
+    assert parser.feed(body[second_member:]) == [("create-2", responses["create-2"])]
+    # Members are not kept in the document.
+    assert parser.close() == {}
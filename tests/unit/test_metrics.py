@@ -0,0 +1,109 @@
+import re
+from itertools import groupby
+
+from farmOS.metrics import (
+    Histogram,
+    InMemoryCollector,
+    Metrics,
+    PrometheusExporter,
+    PushExporter,
+    RequestEvent,
+)
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 2):
+        histogram.observe(value)
+
+    assert histogram.count == 4
+    assert histogram.sum == 2.65
+    assert histogram.cumulative() == [(0.1, 2), (1, 3), (float("inf"), 4)]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.75) == 1
+    assert Histogram().quantile(0.5) is None
+
+
+def test_metrics():
+    metrics = Metrics(buckets=(0.1, 1))
+    metrics(
+        RequestEvent(
+            "iterate", "GET", "api/log/activity", status=200, size=100, seconds=0.05
+        )
+    )
+    metrics(
+        RequestEvent(
+            "iterate", "GET", "api/log/activity", status=200, size=50, seconds=0.5
+        )
+    )
+    metrics(
+        RequestEvent(
+            "iterate", "GET", "api/log/activity", status=200, size=50, cached=True
+        )
+    )
+    metrics(
+        RequestEvent(
+            "send", "POST", "api/log/activity", status=422, size=10, seconds=0.2
+        )
+    )
+
+    summary = metrics.summary()
+    iterate = summary[("iterate", "GET", "api/log/activity")]
+    assert iterate["requests"] == 3
+    assert iterate["cached"] == 1
+    assert iterate["bytes"] == 200
+    assert summary[("send", "POST", "api/log/activity")]["requests"] == 1
+
+    # Cached responses are not included in the latency histogram.
+    assert metrics.endpoints[("iterate", "GET", "api/log/activity")].seconds.count == 2
+
+    metrics.reset()
+    assert metrics.summary() == {}
+
+
+def test_prometheus_exporter():
+    metrics = Metrics(buckets=(0.1, 1))
+    metrics(
+        RequestEvent(
+            "get", "GET", "api/log/activity", status=200, size=100, seconds=0.05
+        )
+    )
+    metrics(
+        RequestEvent("delete", "DELETE", "api/log/activity", status=204, seconds=0.5)
+    )
+
+    text = PrometheusExporter(metrics).render()
+    labels = 'operation="get",method="GET",endpoint="api/log/activity"'
+    assert "# TYPE farmos_client_request_seconds histogram" in text
+    assert f'farmos_client_requests_total{{{labels},status="200"}} 1' in text
+    assert f'farmos_client_request_seconds_bucket{{{labels},le="0.1"}} 1' in text
+    assert f'farmos_client_request_seconds_bucket{{{labels},le="+Inf"}} 1' in text
+    assert f"farmos_client_response_bytes_total{{{labels}}} 100" in text
+
+    # Each metric is declared once and its samples are grouped together.
+    assert text.count("# TYPE farmos_client_requests_total counter") == 1
+    names = [
+        re.sub("_(bucket|sum|count)$", "", line.split("{")[0])
+        for line in text.splitlines()
+        if "{" in line
+    ]
+    families = [name for name, _ in groupby(names)]
+    assert len(families) == len(set(families))
+
+
+def test_push_exporter():
+    metrics = Metrics()
+    collector = InMemoryCollector()
+    exporter = PushExporter(metrics, collector)
+    metrics(RequestEvent("subrequests", "POST", "subrequests", status=207, size=10))
+
+    assert exporter.export() == 5
+    assert collector.get("farmos_client_requests_total", status="207") == 1
+    assert collector.get("farmos_client_request_seconds").count == 1
+
+    # Each export is a snapshot.
+    metrics(RequestEvent("subrequests", "POST", "subrequests", status=207, size=10))
+    exporter.export()
+    assert len(collector.exports) == 2
+    assert collector.get("farmos_client_response_bytes_total") == 20
+    assert collector.exports[0][-2].value == 10
@@ -0,0 +1,170 @@
+import httpx
+import pytest
+from httpx_auth import OAuth2ResourceOwnerPasswordCredentials
+
+from farmOS.filter import Condition, Or
+from farmOS.mock_server import MockFarmServer
+from farmOS.subrequests_model import Action, Subrequest
+
+
+def test_mock_server_crud():
+    server = MockFarmServer()
+    with server.client() as farm:
+        response = farm.log.send("activity", {"attributes": {"name": "Log"}})
+        log = response["data"]
+        assert log["type"] == "log--activity"
+        assert log["attributes"]["drupal_internal__id"] == 1
+
+        updated = farm.log.send(
+            "activity", {"id": log["id"], "attributes": {"status": "done"}}
+        )
+        assert updated["data"]["attributes"]["name"] == "Log"
+        assert updated["data"]["attributes"]["status"] == "done"
+        assert updated["data"]["attributes"]["changed"] > log["attributes"]["changed"]
+
+        assert farm.log.get_id("activity", log["id"])["data"]["id"] == log["id"]
+        assert farm.log.delete("activity", log["id"]).status_code == 204
+        assert farm.log.delete("activity", log["id"]).status_code == 404
+        assert server.get_resources("log", "activity") == []
+
+
+def test_mock_server_pagination():
+    server = MockFarmServer(max_page_size=20)
+    server.populate("log", "observation", 45)
+    with server.client() as farm:
+        page = farm.log.get("observation", {"page[limit]": 50})
+        assert len(page["data"]) == 20
+        assert "page%5Boffset%5D=20" in page["links"]["next"]["href"]
+
+        names = [log["attributes"]["name"] for log in farm.log.iterate("observation")]
+        assert names == [f"observation {index}" for index in range(45)]
+        assert len(list(farm.log.export("observation", shards=4))) == 45
+
+    # One page, 3 pages to iterate, then the 2 id bounds and 4 shards to export.
+    assert len(server.requests) == 1 + 3 + 2 + 4
+
+
+def test_mock_server_query_params():
+    server = MockFarmServer()
+    plants = server.populate(
+        "asset", "plant", 3, attributes=lambda index: {"name": f"Plant {index}"}
+    )
+    for index in range(10):
+        server.add(
+            "log",
+            "harvest",
+            {"name": f"Harvest {index}", "status": "done" if index % 2 else "pending"},
+            {
+                "asset": {
+                    "data": [{"type": "asset--plant", "id": plants[index % 3]["id"]}]
+                }
+            },
+        )
+
+    with server.client() as farm:
+        done = farm.log.get("harvest", farm.filter("status", "done"))
+        assert len(done["data"]) == 5
+
+        ids = farm.log.get(
+            "harvest", farm.filter("drupal_internal__id", [2, 4], "BETWEEN")
+        )
+        assert len(ids["data"]) == 3
+
+        either = Or(Condition("name", "Harvest 1"), Condition("asset.name", "Plant 2"))
+        assert len(farm.log.get("harvest", either.params())["data"]) == 4
+
+        params = {"sort": "-drupal_internal__id", "include": "asset"}
+        params["fields[log--harvest]"] = "name,asset"
+        logs = farm.log.get("harvest", params)
+        assert logs["data"][0]["attributes"] == {"name": "Harvest 9"}
+        assert {asset["id"] for asset in logs["included"]} == {
+            plant["id"] for plant in plants
+        }
+
+        invalid = farm.log.get("harvest", farm.filter("drupal_internal__id", "x"))
+        assert invalid["errors"][0]["status"] == "400"
+
+
+def test_mock_server_subrequests():
+    server = MockFarmServer(
+        validator=lambda resource: (
+            "A name is required." if not resource["attributes"].get("name") else None
+        )
+    )
+    asset = {"data": {"type": "asset--plant", "attributes": {"name": "Plant"}}}
+    log = {
+        "data": {
+            "type": "log--seeding",
+            "attributes": {"name": "Seeding"},
+            "relationships": {
+                "asset": {
+                    "data": [
+                        {
+                            "type": "asset--plant",
+                            "id": "{{create-asset.body@$.data.id}}",
+                        }
+                    ]
+                }
+            },
+        }
+    }
+    invalid = {"data": {"type": "log--seeding", "attributes": {}}}
+    blueprint = [
+        Subrequest(
+            action=Action.create,
+            requestId="create-log",
+            waitFor=["create-asset"],
+            endpoint="api/log/seeding",
+            body=log,
+        ),
+        Subrequest(
+            action=Action.create,
+            requestId="create-asset",
+            endpoint="api/asset/plant",
+            body=asset,
+        ),
+        Subrequest(
+            action=Action.create,
+            requestId="invalid",
+            endpoint="api/log/seeding",
+            body=invalid,
+        ),
+    ]
+    with server.client() as farm:
+        response = farm.subrequests.send(blueprint)
+
+    assert set(response) == {"create-asset", "create-log#body{0}", "invalid"}
+    asset_id = response["create-asset"].json()["data"]["id"]
+    created_log = response.get_response("create-log").json()["data"]
+    assert created_log["relationships"]["asset"]["data"][0]["id"] == asset_id
+    assert list(response.failed()) == ["invalid"]
+    assert response["invalid"].status == 422
+
+
+def test_mock_server_oauth():
+    server = MockFarmServer(require_auth=True)
+    with server.client() as farm:
+        assert farm.get("api").status_code == 401
+
+    auth = OAuth2ResourceOwnerPasswordCredentials(
+        token_url=f"{server.hostname}/oauth/token",
+        username="username",
+        password="password",
+        client_id="farm",
+        scope="farm_manager",
+        client=httpx.Client(transport=server.transport()),
+    )
+    with server.client(auth=auth) as farm:
+        info = farm.info()
+        assert info["meta"]["farm"]["name"] == "Mock farm"
+    assert len(server.tokens) == 1
+
+
+@pytest.mark.anyio
+async def test_mock_server_async_latency():
+    server = MockFarmServer(latency=0.01)
+    server.populate("log", "activity", 120)
+    async with server.async_client() as farm:
+        logs = [log async for log in farm.log.iterate("activity")]
+    assert len(logs) == 120
+    assert len(server.requests) == 3
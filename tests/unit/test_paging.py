@@ -0,0 +1,52 @@
+import pytest
+
+from farmOS.paging import AdaptivePageSize
+
+
+def test_adaptive_page_size_target_seconds():
+    page_size = AdaptivePageSize(target_seconds=1, initial_limit=10, max_limit=100)
+
+    # Fast pages grow the limit, at most doubling each page.
+    assert page_size.record(10, 10, 0.1, 1000) == 20
+    assert page_size.record(20, 20, 0.2, 2000) == 40
+    assert page_size.record(40, 40, 0.4, 4000) == 70
+
+    # Slow pages shrink the limit.
+    assert page_size.record(70, 70, 2.8, 7000) == 48
+    assert page_size.limit == 48
+    assert [stats.limit for stats in page_size.history] == [10, 20, 40, 70]
+
+
+def test_adaptive_page_size_target_bytes():
+    page_size = AdaptivePageSize(
+        target_seconds=10, target_bytes=5000, initial_limit=40, smoothing=1
+    )
+
+    # 100 bytes per record keeps the limit at 50 records.
+    assert page_size.record(40, 40, 0.1, 4000) == 50
+    # 500 bytes per record lowers it to 10 records.
+    assert page_size.record(50, 50, 0.1, 25000) == 10
+
+
+def test_adaptive_page_size_server_maximum():
+    page_size = AdaptivePageSize(target_seconds=10, initial_limit=80, max_limit=200)
+
+    # Fewer records than requested with more pages remaining.
+    assert page_size.record(80, 50, 0.1, 5000) == 50
+    assert page_size.max_limit == 50
+
+    # The last page may have fewer records without lowering the maximum.
+    page_size = AdaptivePageSize(target_seconds=10, initial_limit=80, max_limit=200)
+    page_size.record(80, 12, 0.1, 1200, more=False)
+    assert page_size.max_limit == 200
+
+
+def test_adaptive_page_size_bounds():
+    page_size = AdaptivePageSize(target_seconds=0.01, initial_limit=10, min_limit=5)
+    assert page_size.record(10, 10, 1, 1000) == 5
+
+    # Empty pages keep the current limit.
+    assert page_size.record(5, 0, 0.1, 100) == 5
+
+    with pytest.raises(ValueError):
+        AdaptivePageSize(smoothing=0)
@@ -0,0 +1,104 @@
+import pytest
+
+from farmOS import AsyncFarmPool, FarmPool
+from farmOS.mock_server import MockFarmServer
+from farmOS.ratelimit import AsyncRateLimiter, RateLimiter
+
+
+def get_servers(count=3):
+    servers = [MockFarmServer(hostname=f"http://farm{n}.test") for n in range(count)]
+    for n, server in enumerate(servers):
+        server.populate("log", "activity", n + 1)
+    return servers
+
+
+def count_logs(farm):
+    return sum(1 for _ in farm.log.iterate("activity"))
+
+
+def test_pool_map():
+    servers = get_servers()
+    # The last farm requires a token that the client does not have.
+    servers[-1].require_auth = True
+    farms = {server.hostname: {"transport": server.transport()} for server in servers}
+    with FarmPool(farms, max_clients=2) as pool:
+        # Clients are only created when a farm is used.
+        assert all(farm.client is None for farm in pool._farms.values())
+
+        results, errors = pool.map(count_logs, concurrency=2)
+        assert results == {"http://farm0.test": 1, "http://farm1.test": 2}
+        assert list(errors) == ["http://farm2.test"]
+
+        # Only max_clients clients are kept open.
+        assert sum(farm.client is not None for farm in pool._farms.values()) == 2
+
+        # A subset of the farms can be used.
+        results, errors = pool.map(count_logs, hostnames=["http://farm1.test"])
+        assert results == {"http://farm1.test": 2}
+
+        with pytest.raises(ValueError):
+            pool.add("http://farm0.test")
+        with pytest.raises(ValueError):
+            with pool.client("http://unknown.test"):
+                pass
+
+
+def test_pool_idle_timeout():
+    servers = get_servers(2)
+    with FarmPool(idle_timeout=0) as pool:
+        for server in servers:
+            pool.add(server.hostname, transport=server.transport())
+
+        with pool.client("http://farm0.test") as farm:
+            # Clients in use are not evicted.
+            assert pool.evict_idle() == 0
+            assert count_logs(farm) == 1
+        assert pool.evict_idle() == 1
+        assert pool._farms["http://farm0.test"].client is None
+
+        # A new client is created the next time the farm is used.
+        with pool.client("http://farm0.test") as farm:
+            assert count_logs(farm) == 1
+
+        pool.remove("http://farm0.test")
+        assert pool.hostnames == ["http://farm1.test"]
+
+
+def test_pool_limiter():
+    limiter = RateLimiter(max_in_flight=4)
+    server = MockFarmServer()
+    with FarmPool(
+        limiter=limiter, max_per_host=2, transport=server.transport()
+    ) as pool:
+        pool.add(server.hostname)
+        pool.add("http://other.test", limiter=None)
+
+        # Each farm has its own limiter that shares the pool limiter.
+        with pool.client(server.hostname) as farm:
+            assert farm.limiter.max_in_flight == 2
+            assert farm.limiter.parent is limiter
+        with pool.client("http://other.test") as farm:
+            assert farm.limiter is None
+
+    with pytest.raises(ValueError):
+        FarmPool(max_per_host=0)
+
+
+@pytest.mark.anyio
+async def test_async_pool_map():
+    servers = get_servers()
+    limiter = AsyncRateLimiter(max_in_flight=2)
+
+    async def count_logs(farm):
+        return len([log async for log in farm.log.iterate("activity")])
+
+    async with AsyncFarmPool(limiter=limiter, max_per_host=1) as pool:
+        for server in servers:
+            pool.add(server.hostname, transport=server.async_transport())
+        results, errors = await pool.map(count_logs)
+
+        assert results == {server.hostname: n + 1 for n, server in enumerate(servers)}
+        assert errors == {}
+
+    # Clients are closed with the pool.
+    assert all(farm.client is None for farm in pool._farms.values())
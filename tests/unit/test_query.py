@@ -0,0 +1,69 @@
+from farmOS.filter import And, Condition, Or
+from farmOS.query import Query
+
+
+def test_query_params():
+    query = (
+        Query()
+        .filter("status", "done")
+        .filter("timestamp", 1700000000, ">=")
+        .sort("-timestamp", "name")
+        .include("asset", "quantity")
+        .fields("log--harvest", "name", "timestamp", "status")
+        .page(limit=50, offset=100)
+    )
+
+    assert query.build() == {
+        **And(
+            Condition("status", "done"), Condition("timestamp", 1700000000, ">=")
+        ).params(),
+        "sort": "-timestamp,name",
+        "include": "asset,quantity",
+        "fields[log--harvest]": "name,status,timestamp",
+        "page[limit]": 50,
+        "page[offset]": 100,
+    }
+
+    # A query can be used as a params mapping.
+    assert {**query} == query.build()
+
+
+def test_query_params_are_canonical():
+    query = (
+        Query()
+        .filter("status", "done")
+        .filter("name", "Corn", "CONTAINS")
+        .include("quantity", "asset")
+        .fields("log--harvest", "timestamp", "name")
+    )
+    same_query = (
+        Query()
+        .include("asset")
+        .fields("log--harvest", "name")
+        .filter("name", "Corn", "CONTAINS")
+        .include("quantity")
+        .fields("log--harvest", "timestamp")
+        .filter("status", "done")
+    )
+
+    assert list(query.items()) == list(same_query.items())
+
+
+def test_query_rebuilds_after_changes():
+    query = Query().page(limit=10)
+    assert dict(query) == {"page[limit]": 10}
+
+    query.page(offset=20)
+    assert dict(query) == {"page[limit]": 10, "page[offset]": 20}
+
+
+def test_query_repeated_paths_and_groups():
+    after = Condition("timestamp", 1600000000, ">")
+    before = Condition("timestamp", 1900000000, "<")
+    status = Or(Condition("status", "done"), Condition("status", "pending"))
+    query = Query().where(after, status).where(before)
+
+    params = query.build()
+    paths = [value for key, value in params.items() if key.endswith("[path]")]
+    assert paths.count("timestamp") == 2
+    assert params == And(*sorted([after, before, status], key=repr)).params()
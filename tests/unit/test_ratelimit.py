@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from farmOS.ratelimit import AsyncRateLimiter, RateLimiter, TokenBucket
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=10, burst=2)
+
+    # The burst is available immediately, then tokens are reserved in order.
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_rate_limiter_endpoints():
+    logs = RateLimiter(max_in_flight=1)
+    observations = RateLimiter(max_in_flight=1)
+    limiter = RateLimiter(
+        endpoints={"api/log": logs, "/api/log/observation": observations}
+    )
+
+    # The override with the longest matching prefix is used.
+    assert limiter.limit("api/log/activity").limiter is logs
+    assert limiter.limit("/api/log/observation/1").limiter is observations
+    assert limiter.limit("api/asset/plant").limiter is limiter
+    assert limiter.limit("subrequests").limiter is limiter
+
+
+def test_rate_limiter_max_in_flight():
+    limiter = RateLimiter(max_in_flight=2)
+    lock = threading.Lock()
+    state = {"in_flight": 0, "max": 0}
+
+    def request():
+        with limiter.limit("api/log/activity"):
+            with lock:
+                state["in_flight"] += 1
+                state["max"] = max(state["max"], state["in_flight"])
+            time.sleep(0.01)
+            with lock:
+                state["in_flight"] -= 1
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert state["max"] == 2
+
+
+def test_rate_limiter_parent():
+    shared = RateLimiter(max_in_flight=1)
+    limiter = RateLimiter(max_in_flight=2, parent=shared)
+
+    with limiter.limit("api/log/activity"):
+        # The parent slot is also held.
+        assert not shared._semaphore.acquire(blocking=False)
+    # Both slots are released.
+    assert shared._semaphore.acquire(blocking=False)
+    shared._semaphore.release()
+    assert limiter.limit().parent.limiter is shared
+
+
+def test_rate_limiter_rate():
+    limiter = RateLimiter(rate=100, burst=1)
+    start = time.monotonic()
+    for _ in range(6):
+        with limiter.limit():
+            pass
+    assert time.monotonic() - start >= 0.045
+
+
+@pytest.mark.anyio
+async def test_async_rate_limiter():
+    limiter = AsyncRateLimiter(rate=100, burst=2, max_in_flight=2)
+    state = {"in_flight": 0, "max": 0}
+
+    async def request():
+        async with limiter.limit("api/log/activity"):
+            state["in_flight"] += 1
+            state["max"] = max(state["max"], state["in_flight"])
+            await asyncio.sleep(0.01)
+            state["in_flight"] -= 1
+
+    start = time.monotonic()
+    await asyncio.gather(*[request() for _ in range(6)])
+    assert state["max"] == 2
+    assert time.monotonic() - start >= 0.035
+
+
+@pytest.mark.anyio
+async def test_async_rate_limiter_cancel():
+    limiter = AsyncRateLimiter(rate=1, burst=1, max_in_flight=1)
+    async with limiter.limit():
+        pass
+
+    # Cancelling a request waiting for a token releases its slot.
+    task = asyncio.ensure_future(limiter.limit().__aenter__())
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert not limiter._semaphore.locked()
@@ -0,0 +1,105 @@
+import httpx
+import pytest
+
+from farmOS import FarmClient
+from farmOS.checkpoint import Checkpoint
+from farmOS.filter import Condition
+from farmOS.mock_server import MockFarmServer
+from farmOS.retry import RetryPolicy
+
+
+def failing_transport(server, failures, path="page%5Boffset%5D=5"):
+    """Return a transport that responds 429 to the first requests for a page."""
+    state = {"failures": failures}
+
+    def handle(request):
+        if path in str(request.url) and state["failures"]:
+            state["failures"] -= 1
+            return httpx.Response(
+                429, json={"errors": [{"status": "429", "title": "Too Many Requests"}]}
+            )
+        return server.handle(request)
+
+    return httpx.MockTransport(handle)
+
+
+def test_changes_since_filter():
+    server = MockFarmServer(max_page_size=2)
+    for index in range(6):
+        server.add("log", "activity", {"name": "special" if index % 2 else "other"})
+    params = Condition("name", "special").params()
+
+    with server.client() as farm:
+        cursor = {}
+        logs = list(farm.log.changes_since("activity", cursor=cursor, params=params))
+        assert [log["attributes"]["name"] for log in logs] == ["special"] * 3
+
+        # The cursor filter is combined with the filter of the params.
+        server.add("log", "activity", {"name": "other"})
+        server.add("log", "activity", {"name": "special"})
+        logs = list(farm.log.changes_since("activity", cursor=cursor, params=params))
+        assert [log["attributes"]["name"] for log in logs] == ["special"]
+
+
+def test_iterate_stream_error():
+    server = MockFarmServer(max_page_size=5)
+    server.populate("log", "activity", 12)
+
+    # An error response raises instead of ending the iteration early.
+    transport = failing_transport(server, failures=1)
+    logs = []
+    with FarmClient(server.hostname, transport=transport) as farm:
+        with pytest.raises(httpx.HTTPStatusError):
+            for log in farm.log.iterate("activity", stream=True):
+                logs.append(log)
+    assert len(logs) == 5
+
+    # The page is retried with the client retry policy.
+    transport = failing_transport(server, failures=2)
+    retry = RetryPolicy(backoff=0, jitter=False)
+    with FarmClient(server.hostname, transport=transport, retry=retry) as farm:
+        assert len(list(farm.log.iterate("activity", stream=True))) == 12
+
+
+def test_iterate_checkpoint_error(tmp_path):
+    server = MockFarmServer(max_page_size=5)
+    server.populate("log", "activity", 12)
+    path = tmp_path / "checkpoint.json"
+    params = {"sort": "drupal_internal__id"}
+
+    processed = []
+    checkpoint = Checkpoint(path)
+    with server.client() as farm:
+        with pytest.raises(RuntimeError):
+            try:
+                for log in farm.log.iterate("activity", params, checkpoint=checkpoint):
+                    if len(processed) == 6:
+                        raise RuntimeError("Processing failed.")
+                    processed.append(log["id"])
+            finally:
+                checkpoint.save()
+
+        # The log that failed is returned again when the iteration is resumed.
+        checkpoint = Checkpoint(path)
+        for log in farm.log.iterate("activity", params, checkpoint=checkpoint):
+            processed.append(log["id"])
+    assert processed == [log["id"] for log in server.get_resources("log", "activity")]
+    assert checkpoint.done
+
+
+def test_client_request_override():
+    server = MockFarmServer()
+    methods = []
+
+    class CustomClient(FarmClient):
+        def request(self, method, url, **kwargs):
+            methods.append(method)
+            return super().request(method, url, **kwargs)
+
+    with CustomClient(server.hostname, transport=server.transport()) as farm:
+        log = farm.log.send("activity", {"attributes": {"name": "Log"}})
+        farm.log.get("activity")
+        farm.log.delete("activity", log["data"]["id"])
+
+    # Requests that are not streamed are made with the client request method.
+    assert methods == ["POST", "GET", "DELETE"]
@@ -0,0 +1,190 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from farmOS import AsyncFarmClient, FarmClient
+from farmOS.concurrency import AsyncClock, Clock
+from farmOS.mock_server import MockFarmServer
+from farmOS.retry import RetryBudget, RetryPolicy
+
+
+def failing_handler(server, responses):
+    """Return a handler that returns each response in turn, then uses the server.
+
+    More responses can be appended to the responses list. The methods of the
+    requests that were handled are recorded in requests.
+    """
+    requests = []
+
+    def handle(request):
+        requests.append(request.method)
+        if responses:
+            return responses.pop(0)
+        return server.handle(request)
+
+    return handle, requests
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """Record the retry delays instead of sleeping."""
+    delays = []
+
+    async def sleep(seconds):
+        delays.append(seconds)
+
+    monkeypatch.setattr(Clock, "sleep", staticmethod(delays.append))
+    monkeypatch.setattr(AsyncClock, "sleep", staticmethod(sleep))
+    return delays
+
+
+def test_retry_policy_backoff():
+    policy = RetryPolicy(max_retries=3, backoff=1, max_backoff=3, jitter=False)
+
+    # Retryable statuses are retried with exponential backoff.
+    response = httpx.Response(503)
+    assert [policy.get_delay(attempt, response) for attempt in range(4)] == [
+        1,
+        2,
+        3,
+        None,
+    ]
+
+    # Transport errors are retried.
+    assert policy.get_delay(0) == 1
+
+    # Other statuses are not retried.
+    assert policy.get_delay(0, httpx.Response(200)) is None
+    assert policy.get_delay(0, httpx.Response(404)) is None
+
+
+def test_retry_policy_jitter():
+    policy = RetryPolicy(backoff=1, max_backoff=30)
+    delays = [policy.get_delay(3, httpx.Response(502)) for _ in range(50)]
+    assert all(0 <= delay <= 8 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_retry_policy_methods():
+    policy = RetryPolicy()
+    assert policy.is_retryable_method("get")
+    assert policy.is_retryable_method("DELETE")
+    assert not policy.is_retryable_method("POST")
+    assert not policy.is_retryable_method("PATCH")
+
+
+def test_retry_policy_retry_after():
+    policy = RetryPolicy(max_backoff=60)
+
+    response = httpx.Response(429, headers={"Retry-After": "7"})
+    assert policy.get_delay(0, response) == 7
+
+    date = datetime.now(timezone.utc) + timedelta(seconds=30)
+    response = httpx.Response(503, headers={"Retry-After": format_datetime(date)})
+    assert 25 < policy.get_delay(0, response) <= 30
+
+    # Do not wait longer than max_backoff.
+    response = httpx.Response(429, headers={"Retry-After": "120"})
+    assert policy.get_delay(0, response) is None
+
+
+def test_retry_budget():
+    budget = RetryBudget(ratio=0.5, min_retries=0)
+    policy = RetryPolicy(backoff=0, budget=budget)
+    response = httpx.Response(503)
+
+    # The first request allows half a retry.
+    assert policy.get_delay(0, response) == 0
+    assert policy.get_delay(1, response) is None
+    assert budget.requests == 1
+    assert budget.retries == 1
+
+    # Each request adds to the budget.
+    for _ in range(2):
+        policy.get_delay(0, httpx.Response(200))
+    assert policy.get_delay(0, response) == 0
+    assert policy.get_delay(1, response) is None
+    assert budget.requests == 4
+    assert budget.retries == 2
+
+    # The minimum retries are always available.
+    budget = RetryBudget(ratio=0, min_retries=2)
+    policy = RetryPolicy(backoff=0, budget=budget)
+    assert [policy.get_delay(attempt, response) for attempt in range(3)] == [
+        0,
+        0,
+        None,
+    ]
+
+
+def test_client_retry(delays):
+    server = MockFarmServer()
+    log = server.add("log", "activity", {"name": "Log"})
+    responses = [httpx.Response(503), httpx.Response(429, headers={"Retry-After": "7"})]
+    handle, requests = failing_handler(server, responses)
+    retry = RetryPolicy(backoff=1, jitter=False)
+    transport = httpx.MockTransport(handle)
+    with FarmClient(server.hostname, transport=transport, retry=retry) as farm:
+        # GET requests are retried with backoff, or after Retry-After.
+        response = farm.log.get("activity")
+        assert len(response["data"]) == 1
+        assert requests == ["GET", "GET", "GET"]
+        assert delays == [1, 7]
+
+        # DELETE requests are retried.
+        responses.append(httpx.Response(502))
+        response = farm.log.delete("activity", log["id"])
+        assert response.status_code == 204
+        assert requests[3:] == ["DELETE", "DELETE"]
+        assert delays[2:] == [1]
+
+
+def test_client_retry_methods(delays):
+    server = MockFarmServer()
+    log = server.add("log", "activity", {"name": "Log"})
+    unavailable = {"errors": [{"status": "503", "title": "Service Unavailable"}]}
+    handle, requests = failing_handler(
+        server, [httpx.Response(503, json=unavailable) for _ in range(2)]
+    )
+    retry = RetryPolicy(backoff=1, jitter=False)
+    transport = httpx.MockTransport(handle)
+    with FarmClient(server.hostname, transport=transport, retry=retry) as farm:
+        # POST and PATCH requests are not retried.
+        payload = {"attributes": {"name": "New log"}}
+        assert farm.log.send("activity", payload) == unavailable
+        payload = {"id": log["id"], "attributes": {"name": "Updated log"}}
+        assert farm.log.send("activity", payload) == unavailable
+        assert requests == ["POST", "PATCH"]
+        assert delays == []
+        assert len(server.get_resources("log", "activity")) == 1
+
+
+def test_client_retry_exhausted(delays):
+    server = MockFarmServer()
+    handle, requests = failing_handler(server, [httpx.Response(503)] * 3)
+    retry = RetryPolicy(max_retries=2, backoff=1, jitter=False)
+    transport = httpx.MockTransport(handle)
+    with FarmClient(server.hostname, transport=transport, retry=retry) as farm:
+        with pytest.raises(httpx.HTTPStatusError) as error:
+            farm.log.get("activity")
+    assert error.value.response.status_code == 503
+    assert len(requests) == 3
+    assert delays == [1, 2]
+
+
+@pytest.mark.anyio
+async def test_async_client_retry(delays):
+    server = MockFarmServer()
+    server.add("log", "activity", {"name": "Log"})
+    handle, requests = failing_handler(server, [httpx.Response(503)])
+    retry = RetryPolicy(backoff=1, jitter=False)
+    transport = httpx.MockTransport(handle)
+    async with AsyncFarmClient(
+        server.hostname, transport=transport, retry=retry
+    ) as farm:
+        response = await farm.log.get("activity")
+    assert len(response["data"]) == 1
+    assert requests == ["GET", "GET"]
+    assert delays == [1]
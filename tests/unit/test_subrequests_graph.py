@@ -0,0 +1,109 @@
+import pytest
+
+from farmOS.subrequests_graph import SubrequestsGraph
+from farmOS.subrequests_model import Action, Subrequest
+
+
+def subrequest(request_id, wait_for=None):
+    return Subrequest(
+        action=Action.view,
+        requestId=request_id,
+        waitFor=wait_for,
+        endpoint="api/log/activity",
+    )
+
+
+def request_ids(blueprint):
+    return [sub.requestId for sub in blueprint]
+
+
+def test_subrequests_graph_components():
+    graph = SubrequestsGraph(
+        [
+            subrequest("a"),
+            subrequest("b"),
+            subrequest("c", ["a"]),
+            subrequest("d", ["b", "c"]),
+            subrequest("e"),
+            subrequest(None),
+        ]
+    )
+    assert graph.components() == [[0, 1, 2, 3], [4], [5]]
+    assert graph.get_dependencies(3) == [1, 2]
+
+
+def test_subrequests_graph_chunks():
+    blueprint = []
+    for index in range(5):
+        blueprint.append(subrequest(f"asset{index}"))
+        blueprint.append(subrequest(f"log{index}", [f"asset{index}"]))
+    chunks = SubrequestsGraph(blueprint).chunks(5)
+
+    # Dependent subrequests are kept together and sorted by level.
+    assert [request_ids(chunk) for chunk in chunks] == [
+        ["asset0", "asset1", "log0", "log1"],
+        ["asset2", "asset3", "log2", "log3"],
+        ["asset4", "log4"],
+    ]
+
+
+def test_subrequests_graph_chunks_large_component():
+    blueprint = [subrequest("a")]
+    blueprint.extend(subrequest(f"b{index}", ["a"]) for index in range(4))
+    blueprint.append(subrequest("c"))
+    chunks = SubrequestsGraph(blueprint).chunks(2)
+
+    # A component larger than the chunk size is not split.
+    assert [len(chunk.root) for chunk in chunks] == [5, 1]
+
+
+def test_subrequests_graph_validate():
+    SubrequestsGraph([subrequest("a"), subrequest("b", ["a"])]).validate()
+
+    invalid_blueprints = {
+        "Duplicate requestId": [subrequest("a"), subrequest("a")],
+        "unknown requestId": [subrequest("a", ["missing"])],
+        "cycle": [
+            subrequest("a", ["c"]),
+            subrequest("b", ["a"]),
+            subrequest("c", ["b"]),
+            subrequest("d"),
+        ],
+        "cycle.": [subrequest("a", ["a"])],
+    }
+    for message, blueprint in invalid_blueprints.items():
+        with pytest.raises(ValueError, match=message):
+            SubrequestsGraph(blueprint).validate()
+
+
+def test_subrequests_graph_levels():
+    graph = SubrequestsGraph(
+        [
+            subrequest("log", ["asset", "quantity"]),
+            subrequest("plant_type"),
+            subrequest("asset", ["plant_type"]),
+            subrequest("quantity"),
+            subrequest("unit"),
+        ]
+    )
+    assert graph.levels() == [[1, 3, 4], [2], [0]]
+    assert graph.critical_path() == ["plant_type", "asset", "log"]
+    assert request_ids(graph.ordered()) == [
+        "plant_type",
+        "quantity",
+        "unit",
+        "asset",
+        "log",
+    ]
+    assert graph.stats() == {
+        "subrequests": 5,
+        "components": 2,
+        "largest_component": 4,
+        "depth": 3,
+        "max_width": 3,
+        "critical_path": ["plant_type", "asset", "log"],
+    }
+
+    empty = SubrequestsGraph([])
+    assert empty.levels() == []
+    assert empty.critical_path() == []
@@ -0,0 +1,207 @@
+import json
+
+import httpx
+import pytest
+
+from farmOS import FarmClient
+from farmOS.codec import get_codec
+from farmOS.mock_server import MockFarmServer
+from farmOS.subrequests_model import (
+    Action,
+    Subrequest,
+    SubrequestsBlueprint,
+    TrustedSubrequest,
+    iter_blueprint,
+    serialize_blueprint,
+)
+
+log = {"data": {"type": "log--activity", "attributes": {"name": "Log"}}}
+
+
+def test_serialize_blueprint():
+    blueprint = SubrequestsBlueprint(
+        [
+            Subrequest(
+                action=Action.create,
+                requestId="create",
+                endpoint="api/log/activity",
+                body=log,
+            ),
+            Subrequest(
+                action=Action.view,
+                requestId="view",
+                uri="api/log/activity",
+                headers={"Accept": "application/json", "X-Test": "1"},
+                waitFor=["create"],
+            ),
+        ]
+    )
+    serialized = json.loads(serialize_blueprint(blueprint))
+    assert serialized == [
+        {
+            "action": "create",
+            "uri": "api/log/activity",
+            "requestId": "create",
+            "body": json.dumps(log),
+            "headers": {
+                "Accept": "application/vnd.api+json",
+                "Content-Type": "application/vnd.api+json",
+            },
+        },
+        {
+            "action": "view",
+            "uri": "api/log/activity",
+            "requestId": "view",
+            "headers": {"Accept": "application/json", "X-Test": "1"},
+            "waitFor": ["create"],
+        },
+    ]
+
+    # The subrequests are not modified.
+    assert blueprint[0].endpoint == "api/log/activity"
+    assert blueprint[0].uri is None
+    assert blueprint[1].headers == {"Accept": "application/json", "X-Test": "1"}
+
+
+def test_serialize_trusted_blueprint():
+    trusted = [
+        TrustedSubrequest(
+            action=Action.create,
+            requestId="create",
+            endpoint="api/log/activity",
+            body=log,
+        ),
+        TrustedSubrequest(action="delete", requestId="delete", uri="api/log/x/1"),
+    ]
+    serialized = json.loads(serialize_blueprint(trusted, codec=get_codec("json")))
+    assert serialized[0]["action"] == "create"
+    assert json.loads(serialized[0]["body"]) == log
+    assert serialized[1] == {
+        "action": "delete",
+        "uri": "api/log/x/1",
+        "requestId": "delete",
+        "headers": {"Accept": "application/vnd.api+json"},
+    }
+
+
+def test_send_trusted_blueprint():
+    server = MockFarmServer()
+    blueprint = [
+        TrustedSubrequest(
+            action=Action.create,
+            requestId=str(index),
+            endpoint="api/log/activity",
+            body=log,
+        )
+        for index in range(3)
+    ]
+    with server.client() as farm:
+        response = farm.subrequests.send(blueprint)
+    assert sorted(response) == ["0", "1", "2"]
+    assert all(subresponse.status == 201 for subresponse in response.values())
+    assert len(server.get_resources("log", "activity")) == 3
+
+
+def test_iter_blueprint():
+    codec = get_codec("json")
+    blueprint = [
+        TrustedSubrequest(
+            action=Action.create,
+            requestId=str(index),
+            endpoint="api/log/activity",
+            body=log,
+        )
+        for index in range(10)
+    ]
+    chunks = list(iter_blueprint(blueprint, codec=codec, chunk_size=256))
+    assert len(chunks) > 1
+    assert b"".join(chunks) == serialize_blueprint(blueprint, codec=codec)
+
+
+def test_stream_blueprint():
+    server = MockFarmServer()
+    blueprint = [
+        TrustedSubrequest(
+            action=Action.create,
+            requestId=str(index),
+            endpoint="api/log/activity",
+            body=log,
+        )
+        for index in range(3)
+    ]
+    with server.client() as farm:
+        responses = dict(farm.subrequests.stream(blueprint))
+    assert sorted(responses) == ["0", "1", "2"]
+    assert all(subresponse.status == 201 for subresponse in responses.values())
+    assert responses["0"].json()["data"]["type"] == "log--activity"
+    assert len(server.get_resources("log", "activity")) == 3
+
+    # Graph errors are raised before the request is sent.
+    blueprint[1].waitFor = ["missing"]
+    with server.client() as farm, pytest.raises(ValueError):
+        list(farm.subrequests.stream(blueprint))
+
+    # HTTP errors are raised.
+    server = MockFarmServer(require_auth=True)
+    with server.client(auth=None) as farm, pytest.raises(httpx.HTTPStatusError):
+        list(farm.subrequests.stream(blueprint[:1]))
+
+
+def test_send_error_response():
+    server = MockFarmServer(require_auth=True)
+    blueprint = [
+        TrustedSubrequest(
+            action=Action.create,
+            requestId="0",
+            endpoint="api/log/activity",
+            body=log,
+        )
+    ]
+    with server.client() as farm:
+        # The error of the subrequests request is raised.
+        with pytest.raises(httpx.HTTPStatusError) as error:
+            farm.subrequests.send(blueprint)
+        assert error.value.response.status_code == 401
+
+        # The error is returned for each record of the batch.
+        payloads = [{"attributes": {"name": f"Log {n}"}} for n in range(3)]
+        documents = farm.log.send_many("activity", payloads, batch_size=2)
+        assert len(documents) == 3
+        for document in documents:
+            assert document["errors"][0]["status"] == "401"
+            assert "HTTPStatusError" in document["errors"][0]["detail"]
+
+        statuses = farm.log.delete_many("activity", ["1", "2"])
+        assert statuses == {"1": 401, "2": 401}
+
+
+def test_send_chunk_error():
+    server = MockFarmServer()
+    state = {"posts": 0}
+
+    def handle(request):
+        # Fail the second chunk with an empty 502 response.
+        if request.url.path == "/subrequests":
+            state["posts"] += 1
+            if state["posts"] == 2:
+                return httpx.Response(502)
+        return server.handle(request)
+
+    blueprint = [
+        TrustedSubrequest(
+            action=Action.create,
+            requestId=str(index),
+            endpoint="api/log/activity",
+            body=log,
+        )
+        for index in range(6)
+    ]
+    transport = httpx.MockTransport(handle)
+    with FarmClient(server.hostname, transport=transport) as farm:
+        response = farm.subrequests.send(blueprint, chunk_size=2, concurrency=1)
+
+    # The responses of the other chunks are returned with the failed requestIds.
+    assert sorted(response) == ["0", "1", "4", "5"]
+    assert sorted(response.errors) == ["2", "3"]
+    assert isinstance(response.errors["2"], httpx.HTTPStatusError)
+    assert len(server.get_resources("log", "activity")) == 4
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from farmOS.subrequests_model import SubrequestsResponse, Subresponse
+
+
+class CountingCodec:
+    def __init__(self):
+        self.calls = 0
+
+    def loads(self, data):
+        self.calls += 1
+        return json.loads(data)
+
+
+def subresponse(status, body):
+    return {
+        "headers": {"status": [str(status)], "content-type": ["application/json"]},
+        "body": json.dumps(body) if not isinstance(body, str) else body,
+    }
+
+
+def test_subresponse_lazy_json():
+    codec = CountingCodec()
+    response = Subresponse(subresponse(201, {"data": {"id": "1"}}), codec=codec)
+
+    # The raw headers and body are kept as dict items.
+    assert response["headers"]["status"] == ["201"]
+    assert json.loads(response["body"]) == {"data": {"id": "1"}}
+    assert codec.calls == 0
+
+    assert response.status == 201
+    assert response.ok
+    assert response.headers["content-type"] == ["application/json"]
+
+    # The body is decoded once.
+    assert response.json() == {"data": {"id": "1"}}
+    assert response.json()["data"]["id"] == "1"
+    assert codec.calls == 1
+
+    assert Subresponse({"headers": {"status": ["204"]}, "body": ""}).json() is None
+    assert Subresponse({"headers": {}}).status is None
+
+    error = Subresponse(subresponse(500, "Internal error"))
+    assert not error.ok
+    with pytest.raises(ValueError):
+        error.json()
+
+
+def test_subrequests_response_index():
+    response = SubrequestsResponse(
+        {
+            "create-asset": subresponse(201, {"data": {"id": "asset"}}),
+            "create-log#body{10}": subresponse(201, {"data": {"id": "log10"}}),
+            "create-log#body{2}": subresponse(201, {"data": {"id": "log2"}}),
+            "create-quantity#uri{0}": subresponse(422, {"errors": []}),
+        }
+    )
+    assert all(isinstance(value, Subresponse) for value in response.values())
+    assert response["create-asset"].json()["data"]["id"] == "asset"
+
+    # Fan-out responses are found by requestId in fan-out order.
+    logs = response.get_responses("create-log")
+    assert [log.json()["data"]["id"] for log in logs] == ["log2", "log10"]
+    assert response.get_response("create-log") is logs[0]
+    assert response.get_response("create-asset") is response["create-asset"]
+    assert response.get_responses("missing") == []
+    assert response.get_response("missing") is None
+
+    assert list(response.failed()) == ["create-quantity#uri{0}"]
+
+    # Merging responses updates the index.
+    response.update({"create-log#body{0}": subresponse(201, {"data": {"id": "log0"}})})
+    assert isinstance(response["create-log#body{0}"], Subresponse)
+    assert len(response.get_responses("create-log")) == 3
+    assert response.get_response("create-log").json()["data"]["id"] == "log0"